@@ -0,0 +1,53 @@
+# benchmarks/bench_concurrency.py
+"""
+Throughput vs. concurrency for the LLM-backed routes, against the mock LLM server.
+
+Starts benchmarks/mock_llm_server.py and the backend (uvicorn main:app) as
+subprocesses, then fires requests at increasing concurrency levels.
+With the LLM calls offloaded off the event loop, req/s should grow roughly
+linearly with concurrency until LLM_MAX_CONCURRENCY is reached.
+
+Run from backend/:  python benchmarks/bench_concurrency.py --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import (SAMPLE_PDF, backend_env, run_level, start_backend, start_mock,  # noqa: E402
+                                stop, wait_ready)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--levels", default="1,2,4,8,16")
+    parser.add_argument("--requests-per-level", type=int, default=32)
+    parser.add_argument("--routes", default="/optimize_resume/,/generate_summary/")
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--app-port", type=int, default=8100)
+    args = parser.parse_args()
+
+    mock = start_mock(args.mock_port, "--latency", args.latency)
+    app = start_backend(args.app_port, backend_env(args.mock_port))
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    try:
+        await wait_ready(f"http://127.0.0.1:{args.mock_port}/docs")
+        await wait_ready(base_url + "/")
+        with open(SAMPLE_PDF, "rb") as f:
+            uploads = [("resume.pdf", f.read(), "application/pdf")]
+
+        print(f"mock latency={args.latency}s")
+        for route in args.routes.split(","):
+            for level in (int(x) for x in args.levels.split(",")):
+                row = await run_level(base_url, route, level, args.requests_per_level, uploads, ["Python developer"])
+                print(f"{route:<22} concurrency={level:<3} throughput={row['throughput_rps']:7.2f} req/s "
+                      f"errors={row['errors']}")
+    finally:
+        stop(app, mock)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
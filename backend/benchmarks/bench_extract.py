@@ -0,0 +1,68 @@
+# benchmarks/bench_extract.py
+"""
+extract_text benchmark: the old single-threaded `text += page.extract_text()`
+loop vs. the page-bounded engine in each mode, on sample_resume.pdf and
+synthetic multi-page PDFs.
+
+Run from backend/:  python benchmarks/bench_extract.py
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdfplumber
+
+from benchmarks.corpus import make_pdf
+from benchmarks.harness import SAMPLE_PDF
+from utils import parser as parser_mod
+from utils.parser import extract_text
+
+
+def legacy_extract(data: bytes) -> str:
+    text = ""
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        for page in pdf.pages:
+            text += page.extract_text() or ""
+    return text.strip()
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", default="1,5,20,60")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(SAMPLE_PDF, "rb") as f:
+        docs = [("sample_resume.pdf", f.read())]
+    docs += [(f"synthetic_{n}p.pdf", make_pdf(n)) for n in (int(x) for x in args.pages.split(","))]
+
+    print(f"{'document':<22}{'variant':<28}{'best ms':>10}{'chars':>10}")
+    for name, data in docs:
+        variants = [
+            ("legacy pdfplumber loop", lambda: legacy_extract(data)),
+            ("layout, page-bounded", lambda: extract_text(data, name, mode="layout")),
+            ("fast, page-bounded", lambda: extract_text(data, name, mode="fast")),
+            ("auto, page-bounded", lambda: extract_text(data, name, mode="auto")),
+            ("auto, unbounded", lambda: extract_text(data, name, mode="auto", max_chars=0)),
+        ]
+        for label, fn in variants:
+            best, chars = timed(fn, args.repeat)
+            print(f"{name:<22}{label:<28}{best * 1000:>10.1f}{chars:>10}")
+    parser_mod.shutdown_parser_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_resilience.py
+"""
+Goodput under provider faults: fires /analyze_resume/ requests at a backend
+talking to a misbehaving mock LLM (429/503s, broken JSON, slow tail) and counts
+full LLM answers, degraded (local skill match) answers and errors.
+
+Variants:
+  no-retry   LLM_MAX_RETRIES=0, LLM_JSON_RETRIES=0, breaker off
+  retry      defaults: backoff retries honouring Retry-After, JSON repair + re-ask, breaker
+  hedge      retry + LLM_HEDGE_AFTER_S (a duplicate request for slow calls)
+
+Run from backend/:
+    python benchmarks/bench_resilience.py --error-rate 0.3 --bad-json-rate 0.2 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import (SAMPLE_PDF, backend_env, percentile, start_backend, start_mock, stop,  # noqa: E402
+                                wait_ready)
+
+VARIANTS = {
+    "no-retry": {"LLM_MAX_RETRIES": "0", "LLM_JSON_RETRIES": "0", "LLM_BREAKER_FAILURES": "0"},
+    "retry": {},
+    "hedge": {"LLM_HEDGE_AFTER_S": "1.0"},
+}
+
+
+async def _run(url: str, requests: int, concurrency: int, pdf: bytes):
+    sem = asyncio.Semaphore(concurrency)
+    outcomes, latencies = {"llm": 0, "degraded": 0, "error": 0}, []
+
+    async def one(client, i):
+        async with sem:
+            start = time.perf_counter()
+            try:
+                r = await client.post(url + "/analyze_resume/", files={"file": ("resume.pdf", pdf, "application/pdf")},
+                                      # A distinct JD per request keeps the LLM cache out of the picture
+                                      data={"job_description": f"Python developer with AWS and React #{i}"})
+                body = r.json()
+                kind = "error" if r.status_code != 200 or "error" in body else (
+                    "degraded" if body.get("degraded") else "llm")
+            except httpx.HTTPError:
+                kind = "error"
+            latencies.append(time.perf_counter() - start)
+            outcomes[kind] += 1
+
+    async with httpx.AsyncClient(timeout=120) as client:
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+    return outcomes, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--bad-json-rate", type=float, default=0.2)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    parser.add_argument("--port", type=int, default=8124)
+    parser.add_argument("--mock-port", type=int, default=9124)
+    args = parser.parse_args()
+
+    with open(SAMPLE_PDF, "rb") as f:
+        pdf = f.read()
+    mock = start_mock(args.mock_port, "--latency", args.latency, "--error-rate", args.error_rate,
+                      "--bad-json-rate", args.bad_json_rate, "--slow-rate", args.slow_rate,
+                      "--slow-latency", args.slow_latency)
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{args.mock_port}/docs"))
+        print(f"{'variant':<10}{'llm':>6}{'degraded':>10}{'error':>7}{'goodput %':>11}{'p50 s':>8}{'p95 s':>8}")
+        for name in args.variants.split(","):
+            server = start_backend(args.port, backend_env(args.mock_port, **VARIANTS[name]))
+            try:
+                url = f"http://127.0.0.1:{args.port}"
+                asyncio.run(wait_ready(url + "/"))
+                outcomes, latencies = asyncio.run(_run(url, args.requests, args.concurrency, pdf))
+            finally:
+                stop(server)
+            latencies.sort()
+            print(f"{name:<10}{outcomes['llm']:>6}{outcomes['degraded']:>10}{outcomes['error']:>7}"
+                  f"{100 * outcomes['llm'] / args.requests:>11.1f}"
+                  f"{percentile(latencies, 50):>8.2f}{percentile(latencies, 95):>8.2f}")
+    finally:
+        stop(mock)
+
+
+if __name__ == "__main__":
+    main()
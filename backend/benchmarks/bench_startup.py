@@ -0,0 +1,99 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start benchmark: spawn a fresh uvicorn worker and measure
+  - time until GET / first answers 200 (time-to-first-request)
+  - RSS at that moment and after the worker settles
+  - latency of the first /analyze_resume/ (pays for whatever was deferred)
+
+Variants:
+  eager      imports groq/firebase_admin/pdfplumber/python-docx before the app,
+             like the old module-level setup in main.py
+  lazy       STARTUP_PREWARM=false, everything created on first use
+  prewarm    STARTUP_PREWARM=true (default), clients built on a background thread
+
+Linux only (RSS is read from /proc). Run from backend/:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import JOB_DESCRIPTION, SAMPLE_PDF, proc_status_mb, start, start_mock, stop  # noqa: E402
+
+EAGER_IMPORTS = "import groq, firebase_admin, firebase_admin.firestore, pdfplumber, pypdfium2, docx"
+
+
+def _server_cmd(variant: str, port: int):
+    run = f"import uvicorn; uvicorn.run('main:app', host='127.0.0.1', port={port}, log_level='warning')"
+    if variant == "eager":
+        run = f"{EAGER_IMPORTS}; {run}"
+    return [sys.executable, "-c", run]
+
+
+def measure(variant: str, port: int, mock_url: str, settle_s: float) -> dict:
+    env = {**os.environ, "GROQ_API_KEY": "mock", "GROQ_BASE_URL": mock_url, "LLM_CACHE_BACKEND": "none",
+           "STARTUP_PREWARM": "true" if variant == "prewarm" else "false"}
+    began = time.perf_counter()
+    proc = start(_server_cmd(variant, port), env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(timeout=60) as client:
+            while True:
+                try:
+                    if client.get(url + "/").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+                if time.perf_counter() - began > 60:
+                    raise RuntimeError(f"{variant}: server did not come up")
+            ttfr = time.perf_counter() - began
+            rss_ready = proc_status_mb(proc.pid)
+
+            time.sleep(settle_s)
+            rss_settled = proc_status_mb(proc.pid)
+
+            with open(SAMPLE_PDF, "rb") as f:
+                t0 = time.perf_counter()
+                r = client.post(url + "/analyze_resume/", files={"file": ("sample_resume.pdf", f, "application/pdf")},
+                                data={"job_description": JOB_DESCRIPTION})
+                first_analyze = time.perf_counter() - t0
+            r.raise_for_status()
+            rss_after = proc_status_mb(proc.pid)
+    finally:
+        stop(proc)
+    return {"ttfr": ttfr, "rss_ready": rss_ready, "rss_settled": rss_settled,
+            "first_analyze": first_analyze, "rss_after": rss_after}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--mock-port", type=int, default=9123)
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait before the first analysis")
+    parser.add_argument("--variants", default="eager,lazy,prewarm")
+    args = parser.parse_args()
+
+    mock = start_mock(args.mock_port, "--latency", 0)
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    try:
+        time.sleep(1.0)
+        print(f"{'variant':<10}{'TTFR ms':>10}{'RSS@ready MB':>14}{'RSS settled':>13}"
+              f"{'1st analyze ms':>16}{'RSS after':>11}")
+        for variant in args.variants.split(","):
+            runs = [measure(variant, args.port, mock_url, args.settle) for _ in range(args.runs)]
+            med = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+            print(f"{variant:<10}{med['ttfr'] * 1000:>10.0f}{med['rss_ready']:>14.1f}{med['rss_settled']:>13.1f}"
+                  f"{med['first_analyze'] * 1000:>16.0f}{med['rss_after']:>11.1f}")
+    finally:
+        stop(mock)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# benchmarks/bench_suite.py
+"""
+Offline benchmark suite: the whole backend against the mock Groq server, no network.
+
+http   Starts benchmarks/mock_llm_server.py (--latency / --token-rate) and the
+       backend (uvicorn main:app, LLM cache off), then for each route and
+       concurrency level reports throughput, p50/p95/p99 latency, errors and the
+       server's RSS / peak RSS. Uploads cycle through the corpus (sample_resume.pdf
+       plus generated PDF/DOCX resumes of 1-10 pages, see corpus.py).
+       /market_trends is answered from its in-memory tier after the first call.
+micro  In-process timings (mean/best per call) and tracemalloc peak for
+       extract_text on every corpus document, analyze_text (skills, languages and
+       sections in one pass) and analyze_skill_gap.
+
+Run from backend/:
+    python benchmarks/bench_suite.py --latency 0.5 --token-rate 200 --levels 1,4,16
+    python benchmarks/bench_suite.py --only micro
+    python benchmarks/bench_suite.py --json results.json   # machine-readable, for before/after diffs
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_corpus  # noqa: E402
+from benchmarks.harness import (backend_env, proc_status_mb, run_level, start_backend, start_mock,  # noqa: E402
+                                stop, wait_ready)
+
+ROUTES = "/analyze_resume/,/generate_summary/,/optimize_resume/,/market_trends"
+
+
+# ---------- HTTP ----------
+
+async def run_http(args, corpus):
+    from utils.parser import extract_text
+
+    texts = [extract_text(data, name) for name, data, _ in corpus]
+    mock = start_mock(args.mock_port, "--latency", args.latency, "--token-rate", args.token_rate)
+    app = start_backend(args.app_port, backend_env(args.mock_port))
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    results = []
+    try:
+        await wait_ready(f"http://127.0.0.1:{args.mock_port}/docs")
+        await wait_ready(base_url + "/")
+        print(f"\nHTTP  mock latency={args.latency}s token_rate={args.token_rate}/s  corpus={len(corpus)} docs")
+        print(f"{'route':<22}{'conc':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err':>5}"
+              f"{'rss MB':>9}{'peak MB':>9}")
+        for route in args.routes.split(","):
+            for level in (int(x) for x in args.levels.split(",")):
+                total = max(args.requests, 4 * level)
+                row = await run_level(base_url, route, level, total, corpus, texts)
+                row["rss_mb"] = proc_status_mb(app.pid, "VmRSS")
+                row["peak_rss_mb"] = proc_status_mb(app.pid, "VmHWM")
+                results.append(row)
+                print(f"{route:<22}{level:>5}{row['throughput_rps']:>9.2f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+                      f"{row['p99_ms']:>9.1f}{row['errors']:>5}{row['rss_mb']:>9.1f}{row['peak_rss_mb']:>9.1f}")
+    finally:
+        stop(app, mock)
+    return results
+
+
+# ---------- MICRO ----------
+
+def _time_calls(fn, min_time: float, repeat: int = 3):
+    """(mean, best) seconds per call over `repeat` rounds of at least min_time each."""
+    fn()  # warm-up (lazy imports, regex compilation)
+    means = []
+    for _ in range(repeat):
+        calls, start = 0, time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        means.append(elapsed / calls)
+    return statistics.mean(means), min(means)
+
+
+def _peak_kb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_micro(args, corpus):
+    from utils.parser import extract_text, shutdown_parser_pool
+    from utils.skill_taxonomy import analyze_text
+    from utils.skill_matcher import analyze_skill_gap
+    from benchmarks.corpus import SKILLS
+
+    texts = {name: extract_text(data, name, max_chars=0) for name, data, _ in corpus}
+    cases = []
+    for name, data, _ in corpus:
+        cases.append(("extract_text", name, lambda d=data, n=name: extract_text(d, n)))
+    for name, text in texts.items():
+        cases.append(("analyze_text", f"{name} ({len(text)} chars)", lambda t=text: analyze_text(t)))
+    for n in (5, 20, 100):
+        missing = [f"{SKILLS[i % len(SKILLS)]} {i}" for i in range(n)]
+        cases.append(("analyze_skill_gap", f"{n} missing skills", lambda m=missing: analyze_skill_gap({"missing_skills": m})))
+        cases.append(("analyze_skill_gap", f"{n} missing skills (str)",
+                      lambda m=", ".join(missing): analyze_skill_gap({"missing_skills": m})))
+
+    results = []
+    print(f"\nMICRO  min_time={args.min_time}s per round")
+    print(f"{'function':<20}{'input':<36}{'mean us':>12}{'best us':>12}{'peak KB':>10}")
+    for func, label, fn in cases:
+        mean, best = _time_calls(fn, args.min_time)
+        peak = _peak_kb(fn)
+        results.append({"function": func, "input": label, "mean_us": mean * 1e6, "best_us": best * 1e6, "peak_kb": peak})
+        print(f"{func:<20}{label:<36}{mean * 1e6:>12.1f}{best * 1e6:>12.1f}{peak:>10.1f}")
+    shutdown_parser_pool()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", choices=("http", "micro"), default=None)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock LLM seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="Mock LLM generated tokens/s (0 = instant)")
+    parser.add_argument("--levels", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per level (at least 4x concurrency)")
+    parser.add_argument("--routes", default=ROUTES)
+    parser.add_argument("--corpus", default="", help="Comma-separated corpus.CORPUS_SPECS names (default: all)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Micro-benchmark seconds per round")
+    parser.add_argument("--mock-port", type=int, default=9101)
+    parser.add_argument("--app-port", type=int, default=8101)
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write results to this file")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.corpus)
+    report = {"python": platform.python_version(), "cpus": os.cpu_count(), "args": vars(args)}
+    if args.only in (None, "http"):
+        report["http"] = asyncio.run(run_http(args, corpus))
+    if args.only in (None, "micro"):
+        report["micro"] = run_micro(args, corpus)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
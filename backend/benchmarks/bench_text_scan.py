@@ -0,0 +1,105 @@
+# benchmarks/bench_text_scan.py
+"""
+Text scanning on large documents and in batch screening.
+
+documents  The per-document passes analyze_text() replaces, on a JD and a resume
+           of each --sizes length:
+             separate   the old extract_skills + extract_languages regexes,
+                        find_skills() and a line-by-line section split
+             one pass   analyze_text(): skills, languages and sections from one
+                        SkillAutomaton scan
+batch      --batch resumes screened against one JD, local skill matching only:
+             per resume   local_skill_match() in prescreen and again in
+                          analyze_one (the JD and the resume scanned twice each)
+             jd matcher   jd_skill_matcher(): JD scanned once, each resume once
+
+Run from backend/:  python benchmarks/bench_text_scan.py --sizes 2000,20000,200000 --batch 200
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import resume_lines  # noqa: E402
+from utils.skill_taxonomy import (analyze_text, find_skills, heading_section, jd_skill_matcher,  # noqa: E402
+                                  local_skill_match)
+
+JD_LINES = [
+    "We are hiring a Senior Backend Engineer to build scalable services.",
+    "Requirements: Python, FastAPI or Django, PostgreSQL, Redis, Docker and Kubernetes on AWS.",
+    "Experience with CI/CD (GitHub Actions), Terraform, and machine learning pipelines is a plus.",
+    "Strong communication in English; Spanish or German is nice to have.",
+    "You will design REST APIs, mentor engineers and own system design reviews.",
+]
+
+
+def separate_passes(text: str):
+    # What a caller needed before: two regex passes, the skill scan and a section split
+    langs = re.findall(r'\b(English|Hindi|French|Spanish|German|Chinese|Tamil|Telugu|Arabic|Japanese)\b', text, re.I)
+    languages = sorted(set(l.title() for l in langs))
+    words = sorted(set(w.title() for w in re.findall(r'[A-Za-z+#]+', text) if len(w) > 2))
+    skills = find_skills(text)
+    sections = [line for line in text.splitlines() if heading_section(line.strip())]
+    return words, languages, skills, sections
+
+
+def make_text(kind: str, chars: int, seed: int) -> str:
+    if kind == "jd":
+        out, i, size = [], 0, 0
+        while size < chars:
+            out.append(JD_LINES[i % len(JD_LINES)])
+            size += len(out[-1]) + 1
+            i += 1
+        return "\n".join(out)
+    return "\n".join(resume_lines(max(1, chars // 70), seed))[:chars]
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="2000,20000,200000", help="Document sizes in characters")
+    parser.add_argument("--batch", type=int, default=200, help="Resumes in the batch comparison")
+    parser.add_argument("--jd-lines", type=int, default=30, help="JD length (lines) in the batch comparison")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'document':<10}{'chars':>9}{'separate ms':>13}{'one pass ms':>13}")
+    for size in (int(x) for x in args.sizes.split(",")):
+        for kind in ("jd", "resume"):
+            text = make_text(kind, size, seed=size)
+            assert set(analyze_text(text)["skills"]) == find_skills(text)
+            separate = best_of(lambda: separate_passes(text), args.repeat)
+            single = best_of(lambda: analyze_text(text), args.repeat)
+            print(f"{kind:<10}{len(text):>9}{separate * 1000:>13.1f}{single * 1000:>13.1f}")
+
+    jd = make_text("jd", sum(len(l) + 1 for l in JD_LINES) * args.jd_lines // len(JD_LINES), seed=1)
+    resumes = [make_text("resume", 6000, seed=i) for i in range(args.batch)]
+
+    def per_resume():
+        return [(local_skill_match(r, jd), local_skill_match(r, jd))[1] for r in resumes]
+
+    def with_matcher():
+        match = jd_skill_matcher(jd)
+        return [match(r) for r in resumes]
+
+    assert per_resume() == with_matcher()
+    old = best_of(per_resume, args.repeat)
+    new = best_of(with_matcher, args.repeat)
+    print(f"\nbatch: {args.batch} resumes x {len(jd)}-char JD, local skill matching")
+    print(f"  per resume (twice)  {old * 1000:9.1f} ms")
+    print(f"  jd_skill_matcher    {new * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
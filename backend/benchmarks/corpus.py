@@ -0,0 +1,96 @@
+# benchmarks/corpus.py
+"""Synthetic resume documents for benchmarks (PDFs by hand, DOCX via python-docx)."""
+import io
+import os
+import random
+from typing import List, Tuple
+
+SECTIONS = ["SUMMARY", "EXPERIENCE", "PROJECTS", "SKILLS", "EDUCATION", "CERTIFICATIONS"]
+SKILLS = ["Python", "JavaScript", "React", "Node.js", "Docker", "Kubernetes", "AWS", "SQL", "PostgreSQL",
+          "Machine Learning", "TensorFlow", "FastAPI", "Git", "CI/CD", "Linux", "Java", "C++", "Go"]
+VERBS = ["Developed", "Led", "Optimized", "Designed", "Implemented", "Automated", "Migrated", "Built"]
+
+
+def resume_lines(n_lines: int, seed: int = 0):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n_lines):
+        if i % 18 == 0:
+            lines.append(SECTIONS[(i // 18) % len(SECTIONS)])
+        else:
+            skills = ", ".join(rng.sample(SKILLS, 3))
+            lines.append(f"{rng.choice(VERBS)} services using {skills}, improving throughput by {rng.randint(5, 60)}%.")
+    return lines
+
+
+def _pdf_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 45, seed: int = 0) -> bytes:
+    """A minimal multi-page text PDF (Helvetica, one content stream per page)."""
+    lines = resume_lines(pages * lines_per_page, seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for p in range(pages):
+        chunk = lines[p * lines_per_page:(p + 1) * lines_per_page]
+        body = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({_pdf_escape(l)}) Tj T*" for l in chunk) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_docx(paragraphs: int, seed: int = 0) -> bytes:
+    """A DOCX resume with section headings and one bullet-like paragraph per line."""
+    from docx import Document  # already a backend dependency (utils/parser.py)
+
+    doc = Document()
+    for line in resume_lines(paragraphs, seed):
+        if line in SECTIONS:
+            doc.add_heading(line.title(), level=2)
+        else:
+            doc.add_paragraph(line)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# name -> builder; sizes span a one-page resume to a long CV/portfolio
+CORPUS_SPECS = {
+    "pdf_1p.pdf": lambda: make_pdf(1, seed=1),
+    "pdf_3p.pdf": lambda: make_pdf(3, seed=2),
+    "pdf_10p.pdf": lambda: make_pdf(10, seed=3),
+    "docx_small.docx": lambda: make_docx(40, seed=4),
+    "docx_medium.docx": lambda: make_docx(150, seed=5),
+    "docx_large.docx": lambda: make_docx(600, seed=6),
+}
+
+
+def build_corpus(names: str = "") -> List[Tuple[str, bytes, str]]:
+    """[(filename, bytes, content_type)]: sample_resume.pdf plus the generated documents."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(backend_dir, "sample_resume.pdf"), "rb") as f:
+        corpus = [("sample_resume.pdf", f.read(), PDF_MIME)]
+    wanted = [n for n in names.split(",") if n] or list(CORPUS_SPECS)
+    for name in wanted:
+        corpus.append((name, CORPUS_SPECS[name](), DOCX_MIME if name.endswith(".docx") else PDF_MIME))
+    return corpus
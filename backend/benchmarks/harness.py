@@ -0,0 +1,135 @@
+# benchmarks/harness.py
+"""
+Shared plumbing for the HTTP benchmarks: starting the mock Groq server and the
+backend as subprocesses, waiting for them to answer, reading their memory, and
+driving one route at a fixed concurrency with latency percentiles.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PDF = os.path.join(BACKEND_DIR, "sample_resume.pdf")
+JOB_DESCRIPTION = "Backend engineer with Python, FastAPI, Docker, Kubernetes and AWS experience."
+
+# (filename, bytes, mime) uploads, as built by corpus.build_corpus()
+Upload = Tuple[str, bytes, str]
+
+
+# ---------- PROCESSES ----------
+
+def start(cmd, env=None) -> subprocess.Popen:
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def start_mock(port: int, *flags) -> subprocess.Popen:
+    """benchmarks/mock_llm_server.py on port; flags are passed through (e.g. "--latency", 0.5)."""
+    return start([sys.executable, "benchmarks/mock_llm_server.py", "--port", str(port), *map(str, flags)])
+
+
+def backend_env(mock_port: int, **overrides: str) -> Dict[str, str]:
+    # Cache disabled so every request really goes to the (mock) LLM
+    env = dict(os.environ, GROQ_API_KEY="mock", GROQ_BASE_URL=f"http://127.0.0.1:{mock_port}",
+               LLM_CACHE_BACKEND="none", REQUEST_TIMING_LOG="false", **overrides)
+    env.pop("FIREBASE_SERVICE_ACCOUNT_FILE", None)
+    return env
+
+
+def start_backend(port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return start([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"], env)
+
+
+def stop(*procs: subprocess.Popen):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        proc.wait()
+
+
+async def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up in {timeout}s")
+
+
+def proc_status_mb(pid: int, field: str = "VmRSS") -> float:
+    # Linux only; VmRSS = current, VmHWM = peak resident set since start
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+# ---------- LOAD ----------
+
+async def one_request(client: httpx.AsyncClient, route: str, i: int, uploads: Sequence[Upload],
+                      texts: Sequence[str]):
+    """Request i against route; raises on HTTP errors and on {"error": ...} bodies."""
+    name, data, mime = uploads[i % len(uploads)]
+    if route == "/analyze_resume/":
+        r = await client.post(route, files={"file": (name, data, mime)}, data={"job_description": JOB_DESCRIPTION})
+    elif route == "/generate_summary/":
+        r = await client.post(route, files={"file": (name, data, mime)})
+    elif route == "/optimize_resume/":
+        r = await client.post(route, data={"resume_text": texts[i % len(texts)], "job_description": JOB_DESCRIPTION,
+                                           "missing_skills": "Kubernetes, AWS"})
+    else:
+        r = await client.get(route)
+    r.raise_for_status()
+    body = r.json()
+    if isinstance(body, dict) and "error" in body:
+        raise RuntimeError(body["error"])
+
+
+async def run_level(base_url: str, route: str, concurrency: int, total: int, uploads: Sequence[Upload],
+                    texts: Sequence[str]) -> dict:
+    """total requests at most concurrency at a time: throughput, p50/p95/p99 latency and errors."""
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        async def worker(i: int):
+            nonlocal errors
+            async with sem:
+                start_at = time.perf_counter()
+                try:
+                    await one_request(client, route, i, uploads, texts)
+                    latencies.append(time.perf_counter() - start_at)
+                except (httpx.HTTPError, RuntimeError, ValueError):
+                    errors += 1
+
+        start_at = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(total)))
+        elapsed = time.perf_counter() - start_at
+    latencies.sort()
+    return {
+        "route": route, "concurrency": concurrency, "requests": total, "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
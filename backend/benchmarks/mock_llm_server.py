@@ -0,0 +1,130 @@
+# benchmarks/mock_llm_server.py
+"""
+Minimal Groq/OpenAI-compatible chat completions server for offline benchmarks.
+
+Run:  python benchmarks/mock_llm_server.py --port 9100 --latency 0.5 --token-rate 50
+Then point the backend at it:  GROQ_BASE_URL=http://127.0.0.1:9100  GROQ_API_KEY=mock
+
+Fault injection: --error-rate answers that share of calls with 429/503 (+ Retry-After),
+--bad-json-rate corrupts that share of JSON responses (truncated / wrapped in prose),
+--slow-rate delays that share of calls by --slow-latency seconds (tail latency for hedging).
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+LATENCY_S = 0.5          # time to first token
+TOKENS_PER_S = 0.0       # 0 = the rest of the completion arrives instantly
+ERROR_RATE = 0.0
+BAD_JSON_RATE = 0.0
+SLOW_RATE = 0.0
+SLOW_LATENCY_S = 5.0
+
+ANALYSIS_JSON = {
+    "skill_match_pct": 72,
+    "summary": "Mock candidate with solid Python and React experience.",
+    "strengths": ["Python", "React"],
+    "missing_skills": ["Kubernetes", "AWS"],
+    "weaknesses": ["Limited cloud exposure"],
+    "suggestions": ["Add measurable project outcomes"],
+}
+TRENDS_JSON = {"skills": ["Python", "Cloud Computing (AWS/Azure)", "Machine Learning", "React/Node.js",
+                          "SQL", "DevOps", "Data Analysis", "Cybersecurity", "Effective Communication", "Problem Solving"]}
+SUMMARY_TEXT = "**Mock** summary of a software engineer focused on backend development and data pipelines."
+
+app = FastAPI()
+
+
+def _mock_content(body: dict) -> str:
+    system = " ".join(m.get("content", "") for m in body.get("messages", []) if m.get("role") == "system")
+    if "JSON array" in system:
+        return json.dumps(TRENDS_JSON)
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps(ANALYSIS_JSON)
+    if "Resume Editor" in system:
+        return "```markdown\n## Experience\n- Developed mock services in Python.\n- Optimized mock pipelines by 30%.\n```"
+    return SUMMARY_TEXT
+
+
+def _tokens(content: str):
+    # ~4 chars per token, split on word boundaries
+    words = content.split(" ")
+    return [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+
+
+def _usage(content: str) -> dict:
+    return {"prompt_tokens": 100, "completion_tokens": len(content) // 4, "total_tokens": 100 + len(content) // 4}
+
+
+async def _stream(body: dict, content: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    for token in _tokens(content):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        if TOKENS_PER_S:
+            await asyncio.sleep(1.0 / TOKENS_PER_S)
+    # Like Groq: usage arrives in x_groq on a final, empty-delta chunk
+    final = {**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+             "x_groq": {"usage": _usage(content)}}
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    slow = random.random() < SLOW_RATE
+    await asyncio.sleep(SLOW_LATENCY_S if slow else LATENCY_S)
+    if random.random() < ERROR_RATE:
+        status = random.choice((429, 503))
+        return JSONResponse({"error": {"message": f"mock {status}", "type": "mock_error"}}, status_code=status,
+                            headers={"retry-after": "0.2"})
+    content = _mock_content(body)
+    if body.get("response_format") and random.random() < BAD_JSON_RATE:
+        # Half the time repairable (prose + trailing comma), half truncated mid-object
+        content = (f"Sure! {content[:-1]},}}" if random.random() < 0.5 else content[: len(content) // 2])
+    if body.get("stream"):
+        return StreamingResponse(_stream(body, content), media_type="text/event-stream")
+    if TOKENS_PER_S:
+        await asyncio.sleep(len(_tokens(content)) / TOKENS_PER_S)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": _usage(content),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=LATENCY_S, help="Seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=TOKENS_PER_S, help="Generated tokens/s (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE, help="Share of calls failing with 429/503")
+    parser.add_argument("--bad-json-rate", type=float, default=BAD_JSON_RATE, help="Share of JSON responses corrupted")
+    parser.add_argument("--slow-rate", type=float, default=SLOW_RATE, help="Share of calls delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=SLOW_LATENCY_S)
+    args = parser.parse_args()
+    LATENCY_S = args.latency
+    TOKENS_PER_S = args.token_rate
+    ERROR_RATE = args.error_rate
+    BAD_JSON_RATE = args.bad_json_rate
+    SLOW_RATE = args.slow_rate
+    SLOW_LATENCY_S = args.slow_latency
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -1,6 +1,9 @@
 # main.py
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
 # --- Removed SQLAlchemy imports ---
 from datetime import datetime, timedelta, timezone 
 import os
@@ -8,11 +11,11 @@ import uvicorn
 from dotenv import load_dotenv
 from collections import Counter
 import json
-
-# --- NEW FIREBASE ADMIN IMPORTS ---
-import firebase_admin
-from firebase_admin import credentials, firestore
-# ------------------------------------
+import base64
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
 
 # --- CENTRALIZED GROQ API KEY SETUP ---
 load_dotenv() # Load .env file immediately
@@ -21,40 +24,118 @@ GROQ_MODEL = "llama-3.1-8b-instant"
 
 if not GROQ_API_KEY:
     raise ValueError("FATAL ERROR: GROQ_API_KEY is missing from .env or environment.")
-
-from groq import Groq, GroqError
-groq_client = Groq(api_key=GROQ_API_KEY) 
 # --- END API SETUP ---
 
-# --- UPDATED: FIREBASE ADMIN SDK SETUP (Filepath method) ---
-fs_db = None
-try:
-    # We'll get the FILEPATH from an environment variable
-    service_account_filepath = os.getenv("FIREBASE_SERVICE_ACCOUNT_FILE")
-    
-    if service_account_filepath and os.path.exists(service_account_filepath):
-        cred = credentials.Certificate(service_account_filepath)
-        firebase_admin.initialize_app(cred)
-        fs_db = firestore.client()
-        print("--- DEBUG: Firebase Admin SDK initialized successfully from file. ---")
-    elif service_account_filepath:
-        print(f"--- ERROR: FIREBASE_SERVICE_ACCOUNT_FILE path specified ('{service_account_filepath}'), but file not found. Caching disabled. ---")
-    else:
-        print("--- WARNING: FIREBASE_SERVICE_ACCOUNT_FILE not set in .env. Firestore caching will be disabled. ---")
-except Exception as e:
-    print(f"--- ERROR: Failed to initialize Firebase Admin from file: {e} ---")
-# --- END FIREBASE ADMIN SETUP ---
+# --- LAZY CLIENTS ---
+# The Groq client and Firebase Admin/Firestore are created on first use
+# (utils/clients.py), so a cold start or new worker can answer GET / without
+# paying for them. STARTUP_PREWARM builds them in the background after startup.
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "true").lower() in ("1", "true", "yes")
 
 
 # --- IMPORT UTILS ---
-from utils.parser import extract_text 
-from utils.analyzer import analyze_resume 
-from utils.summary import generate_summary
-from utils.skill_matcher import analyze_skill_gap
+from utils.uploads import extract_upload_text, MaxBodySizeMiddleware, BATCH_MAX_REQUEST_BYTES
+from utils.batch import collect_documents, read_document, run_batch, should_skip_llm
+from utils.parser import shutdown_parser_pool, preload_parsers
+from utils.analyzer import (analyze_resume, analysis_cache_key, finalize_analysis, local_analysis_result,
+                            degraded_analysis_result)
+from utils.skill_taxonomy import jd_skill_matcher, local_skill_match
+from utils.skill_matcher import resource_catalog
+from utils.summary import generate_summary, summary_cache_key, stream_summary, summary_cleaner
+from utils.optimizer import optimize_resume, optimize_cache_key, stream_optimized_resume, optimize_cleaner
+from utils.llm import run_llm, stream_llm, create_chat_completion, shutdown_llm_executor
+from utils.streaming import format_event
+from utils.documents import store_document, get_document
+from utils.cache import build_llm_cache, StaleWhileRevalidate
+from utils.clients import get_groq_client, get_firestore, firestore_configured
+from utils.metrics import TimingMiddleware, render_metrics, stage
+from utils.resilience import repair_json, CircuitOpenError, LLM_JSON_RETRIES, llm_breaker
+from utils.scheduler import llm_priority, PRIORITY_BATCH, PRIORITY_BACKGROUND
+from utils.jobs import JobQueue, QueueFullError, RetryLater
 # --------------------
 
+# ---------- LIFESPAN ----------
+def _prewarm():
+    # Runs on a background thread: the worker already accepts requests meanwhile
+    try:
+        get_groq_client()
+        get_firestore()
+        preload_parsers()
+        resource_catalog.get_many([])  # loads SKILL_RESOURCES_FILE / precomputes taxonomy links
+        print("--- DEBUG: Startup prewarm finished. ---")
+    except Exception as e:
+        print(f"--- WARNING: Startup prewarm failed: {e} ---")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STARTUP_PREWARM:
+        threading.Thread(target=_prewarm, name="startup-prewarm", daemon=True).start()
+    job_queue.start()
+    yield
+    await job_queue.stop()
+    shutdown_llm_executor()
+    shutdown_parser_pool()
+
 # ---------- CONFIG ----------
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# --- LLM RESULT CACHE (LLM_CACHE_BACKEND=memory|sqlite|firestore|none) ---
+# The Firestore backend gets the lazy getter, so Firebase still initializes on first use.
+llm_cache = build_llm_cache(fs_db=get_firestore if firestore_configured() else None)
+
+# --- ASYNC JOB MODE (job=true on /analyze_resume/, /optimize_resume/, /analyze_batch/) ---
+# Persistent SQLite queue + JOB_WORKERS workers per process; see utils/jobs.py.
+job_queue = JobQueue()
+
+
+async def _submit_job(kind: str, payload: dict) -> JSONResponse:
+    """202 with the job id and where to poll/subscribe; 503 + Retry-After when the queue is full."""
+    try:
+        job = await job_queue.submit(kind, payload)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after + 0.999))})
+    job_id = job["job_id"]
+    return JSONResponse({**job, "status_url": f"/jobs/{job_id}", "events_url": f"/jobs/{job_id}/events"},
+                        status_code=202)
+
+
+def _is_ok_analysis(result) -> bool:
+    return isinstance(result, dict) and "error" not in result
+
+
+def _is_cacheable_analysis(result) -> bool:
+    # Degraded (local fallback) results are served but never cached
+    return _is_ok_analysis(result) and not result.get("degraded")
+
+
+def _is_ok_summary(result) -> bool:
+    return isinstance(result, str) and not result.startswith("Error generating summary")
+
+# --- /analyze_resume/ LLM FAN-OUT ---
+# Per-call timeouts (seconds) for the parallel analyzer/summary calls.
+ANALYZE_TIMEOUT_S = float(os.getenv("ANALYZE_TIMEOUT_S", "60"))
+SUMMARY_TIMEOUT_S = float(os.getenv("SUMMARY_TIMEOUT_S", "30"))
+# When false, skip the separate summary call and reuse the analyzer's "summary" field.
+USE_SEPARATE_SUMMARY = os.getenv("USE_SEPARATE_SUMMARY", "true").lower() in ("1", "true", "yes")
+
+# --- RESPONSE COMPRESSION (RESPONSE_COMPRESSION=gzip|br|none) ---
+# br needs the optional brotli-asgi package and falls back to gzip without it.
+# Starlette's GZipMiddleware leaves text/event-stream responses uncompressed.
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "gzip").lower()
+if RESPONSE_COMPRESSION == "br":
+    try:
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware, minimum_size=1000)
+    except ImportError:
+        print("--- WARNING: brotli-asgi not installed; using gzip compression. ---")
+        RESPONSE_COMPRESSION = "gzip"
+if RESPONSE_COMPRESSION == "gzip":
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# Reject oversized uploads while they stream in (MAX_REQUEST_BYTES).
+# Added before CORS so CORS stays outermost and 413s still carry CORS headers.
+app.add_middleware(MaxBodySizeMiddleware, path_limits={"/analyze_batch/": BATCH_MAX_REQUEST_BYTES})
 
 # --- UPDATED CORS ---
 # Read the client URL from an environment variable for deployment
@@ -66,106 +147,312 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 # --- END UPDATED CORS ---
 
+# Per-stage timings -> Server-Timing header, /metrics histograms and TIMING log lines.
+# Outermost, so request latency covers every other middleware too.
+app.add_middleware(TimingMiddleware)
+
 # --- DELETED: SQLAlchemy Database Section ---
 
+# --- STREAMING (SSE) for the long text generations ---
+# Events: "delta" {"text"} as cleaned tokens arrive, then "done" {"text": full}
+# or "error" {"error"}. Cache hits are replayed as a single delta.
+def _stream_llm_text(cache_key: str, stream_func, args: tuple, cleaner) -> StreamingResponse:
+    async def events():
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            yield format_event({"type": "delta", "text": cached}, "sse")
+            yield format_event({"type": "done", "text": cached}, "sse")
+            return
+
+        parts = []
+        try:
+            async for delta in stream_llm(stream_func, *args):
+                text = cleaner.feed(delta)
+                if text:
+                    parts.append(text)
+                    yield format_event({"type": "delta", "text": text}, "sse")
+            text = cleaner.finish()
+            if text:
+                parts.append(text)
+                yield format_event({"type": "delta", "text": text}, "sse")
+        except Exception as e:
+            yield format_event({"type": "error", "error": str(e)}, "sse")
+            return
+
+        full_text = "".join(parts)
+        await llm_cache.set(cache_key, full_text)
+        yield format_event({"type": "done", "text": full_text}, "sse")
+
+    # X-Accel-Buffering: no keeps nginx-style proxies from buffering the stream
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # ---------- ROUTES ----------
 @app.get("/")
 def root():
     return {"message": "Resume Analyzer API (Groq Llama 3.1)"}
 
 @app.post("/generate_summary/")
-async def generate_summary_route(file: UploadFile = File(...)):
-    file_path = f"temp_{file.filename}"
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
-    
-    resume_text = extract_text(file_path)
-    os.remove(file_path)
-    summary = generate_summary(resume_text, groq_client, GROQ_MODEL)
+async def generate_summary_route(file: UploadFile = File(...), stream: bool = Form(False)):
+    resume_text = await extract_upload_text(file)
+    cache_key = summary_cache_key(resume_text, GROQ_MODEL)
+    if stream:
+        return _stream_llm_text(cache_key, stream_summary, (resume_text, get_groq_client(), GROQ_MODEL), summary_cleaner())
+    summary = await llm_cache.run(cache_key, generate_summary,
+                                  resume_text, get_groq_client(), GROQ_MODEL, should_cache=_is_ok_summary)
     return {"summary": summary}
 
 
-@app.post("/analyze_resume/")
-async def analyze_resume_route(file: UploadFile = File(...), job_description: str = Form(...)):
-    file_path = f"temp_{file.filename}"
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+# --- RESPONSE PROJECTION for /analyze_resume/ ---
+ANALYSIS_FIELDS = ("skill_match", "missing_skills", "strengths", "weaknesses", "suggestions",
+                   "learning_resources", "summary")
+OPT_IN_FIELDS = ("resume_text", "raw_ai")
+
+
+def _project_fields(response: dict, fields: Optional[str]) -> dict:
+    """
+    Without fields: every analysis field + document_id. With fields="a,b": just
+    those (document_id and the degraded flag are always included).
+    resume_text/raw_ai only when asked for.
+    """
+    if fields:
+        wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    else:
+        wanted = set(ANALYSIS_FIELDS)
+    wanted.update(("document_id", "degraded"))
+    return {k: v for k, v in response.items() if k in wanted}
+
 
+@app.post("/analyze_resume/")
+async def analyze_resume_route(
+    file: UploadFile = File(...),
+    job_description: str = Form(...),
+    separate_summary: Optional[bool] = Form(None),
+    fields: Optional[str] = Form(None),
+    job: bool = Form(False),
+):
     try:
-        resume_text = extract_text(file_path)
+        resume_text = await extract_upload_text(file)
         print(f"--- DEBUG: Extracted Text Length: {len(resume_text)} ---")
+    except HTTPException:
+        raise
     except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)
         raise HTTPException(status_code=400, detail=f"File parsing error: {str(e)}")
-    finally:
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception:
-                pass
 
-    try:
-        ai_result = analyze_resume(resume_text, job_description, groq_client, GROQ_MODEL)
-    except Exception as e:
-        return {"error": f"Analyzer exception: {str(e)}"}
-
-    if not isinstance(ai_result, dict):
-        return {"error": "Analyzer returned unexpected type (expected dict)."}
+    if job:
+        return await _submit_job("analyze_resume", {"resume_text": resume_text, "job_description": job_description,
+                                                    "separate_summary": separate_summary, "fields": fields})
+    return await _analyze_text(resume_text, job_description, separate_summary, fields)
+
+
+async def _analyze_text(resume_text: str, job_description: str, separate_summary: Optional[bool],
+                        fields: Optional[str]) -> dict:
+    # --- Analyzer and summary are independent LLM round trips: fan them out ---
+    use_separate_summary = USE_SEPARATE_SUMMARY if separate_summary is None else separate_summary
+
+    analyze_task = llm_cache.run(analysis_cache_key(resume_text, job_description, GROQ_MODEL), analyze_resume,
+                                 resume_text, job_description, get_groq_client(), GROQ_MODEL,
+                                 timeout=ANALYZE_TIMEOUT_S, should_cache=_is_cacheable_analysis)
+    if use_separate_summary:
+        summary_task = llm_cache.run(summary_cache_key(resume_text, GROQ_MODEL), generate_summary,
+                                     resume_text, get_groq_client(), GROQ_MODEL,
+                                     timeout=SUMMARY_TIMEOUT_S, should_cache=_is_ok_summary)
+        ai_result, summary = await asyncio.gather(analyze_task, summary_task, return_exceptions=True)
+    else:
+        ai_result = (await asyncio.gather(analyze_task, return_exceptions=True))[0]
+        summary = None
 
-    if "error" in ai_result:
-        return {"error": ai_result["error"], "raw_ai": ai_result}
+    if use_separate_summary and not _is_ok_summary(summary):
+        print(f"--- WARNING: Summary call failed, falling back to analyzer summary: {summary!r} ---")
+        summary = None
 
-    summary = generate_summary(resume_text, groq_client, GROQ_MODEL)
-    gap = analyze_skill_gap(ai_result)
+    # A timed-out analysis degrades to the local skill match instead of failing
+    if isinstance(ai_result, asyncio.TimeoutError):
+        ai_result = degraded_analysis_result(local_skill_match(resume_text, job_description),
+                                             f"Analyzer timed out after {ANALYZE_TIMEOUT_S}s")
+    # Partial results: a failed analysis still returns whatever summary we got.
+    if isinstance(ai_result, BaseException):
+        return {"error": f"Analyzer exception: {str(ai_result)}", "summary": summary}
 
-    ai_result["summary"] = summary
-    ai_result["missing_skills"] = gap.get("missing_skills", [])
-    ai_result["learning_resources"] = gap.get("learning_resources", {})
+    if not isinstance(ai_result, dict):
+        return {"error": "Analyzer returned unexpected type (expected dict).", "summary": summary}
 
-    skill_match = ai_result.get("skill_match_pct") or ai_result.get("skill_match") or 0.0
-    try:
-        skill_match = float(skill_match)
-    except Exception:
-        skill_match = 0.0
+    if "error" in ai_result:
+        return {"error": ai_result["error"], "raw_ai": ai_result, "summary": summary}
 
-    missing_skills_list = ai_result.get("missing_skills", []) or []
-    strengths = ai_result.get("strengths", []) or []
-    weaknesses = ai_result.get("weaknesses", []) or []
-    suggestions = ai_result.get("suggestions", []) or []
+    # Reuse the "summary" field from the analyzer schema when the separate call is skipped or failed
+    if summary is None:
+        summary = ai_result.get("summary", "")
+    analysis = finalize_analysis(ai_result, summary)
+    if ai_result.get("degraded"):
+        analysis["degraded"] = True
 
     # --- DELETED: SQLAlchemy database logic for history ---
 
-    # We just return the raw analysis data.
+    # We just return the analysis data plus a handle to the parsed resume;
+    # resume_text/raw_ai are opt-in through fields=.
     # The frontend (App.jsx) will save this to Firestore.
     response = {
-        "skill_match": skill_match,
-        "missing_skills": missing_skills_list,
-        "strengths": strengths,
-        "weaknesses": weaknesses,
-        "suggestions": suggestions,
-        "learning_resources": ai_result.get("learning_resources", {}),
-        "summary": summary, 
+        **analysis,
+        "document_id": await store_document(resume_text),
         "resume_text": resume_text,
         "raw_ai": ai_result,
     }
 
-    return response
+    return _project_fields(response, fields)
+
+
+@job_queue.handler("analyze_resume")
+async def _analyze_job(payload: dict, progress) -> dict:
+    return await _analyze_text(payload["resume_text"], payload["job_description"],
+                               payload.get("separate_summary"), payload.get("fields"))
+
+# --- BATCH SCREENING: many resumes against one JD, streamed as they finish ---
+@app.post("/analyze_batch/")
+async def analyze_batch_route(
+    files: List[UploadFile] = File(...),
+    job_description: str = Form(...),
+    stream_format: str = Form("ndjson"),
+    job: bool = Form(False),
+):
+    if stream_format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="stream_format must be 'ndjson' or 'sse'")
+
+    documents, errors = await run_in_threadpool(collect_documents, files)
+    if not documents and not errors:
+        raise HTTPException(status_code=400, detail="No resumes uploaded")
+
+    if job:
+        # Parsing happens in the job too; the raw files travel in the job row
+        encoded, read_errors = await run_in_threadpool(_encode_documents, documents)
+        return await _submit_job("analyze_batch", {"documents": encoded, "errors": errors + read_errors,
+                                                   "job_description": job_description})
+
+    async def event_stream():
+        for event in errors:
+            yield format_event(event, stream_format)
+        async for event in _batch_events(documents, job_description):
+            yield format_event(event, stream_format)
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type)
+
+
+def _encode_documents(documents) -> Tuple[List[dict], List[dict]]:
+    encoded, errors = [], []
+    for name, source in documents:
+        try:
+            data = read_document(source)
+        except ValueError as e:
+            errors.append({"type": "error", "filename": name, "error": str(e)})
+            continue
+        encoded.append({"filename": name, "data": base64.b64encode(data).decode("ascii")})
+    return encoded, errors
+
+
+def _batch_events(documents, job_description: str):
+    """run_batch() events for the resumes in documents against one JD."""
+    # The JD is scanned once per batch and each resume once: prescreen hands its match to analyze_one
+    match_skills = jd_skill_matcher(job_description)
+    local_matches = {}
+
+    def prescreen(resume_text: str):
+        # Clearly non-matching resumes are scored locally, without an LLM call
+        local_match = match_skills(resume_text)
+        if should_skip_llm(local_match):
+            return {**finalize_analysis(local_analysis_result(local_match), ""), "source": "local"}
+        local_matches[resume_text] = local_match
+        return None
+
+    async def analyze_one(resume_text: str):
+        local_match = local_matches.pop(resume_text, None) or match_skills(resume_text)
+        # Batch mode reuses the analyzer's own summary instead of a second LLM call;
+        # its calls queue behind interactive ones for LLM slots and rate-limit budget
+        with llm_priority(PRIORITY_BATCH):
+            try:
+                ai_result = await llm_cache.run(analysis_cache_key(resume_text, job_description, GROQ_MODEL),
+                                                analyze_resume, resume_text, job_description, get_groq_client(),
+                                                GROQ_MODEL, local_match,
+                                                timeout=ANALYZE_TIMEOUT_S, should_cache=_is_cacheable_analysis)
+            except asyncio.TimeoutError:
+                # Same degrade as /analyze_resume/: the local skill match instead of an error
+                ai_result = degraded_analysis_result(local_match, f"Analyzer timed out after {ANALYZE_TIMEOUT_S}s")
+        if not _is_ok_analysis(ai_result):
+            return {"error": ai_result.get("error", "Analyzer failed") if isinstance(ai_result, dict) else "Analyzer failed"}
+        analysis = finalize_analysis(ai_result, ai_result.get("summary", ""))
+        if ai_result.get("degraded"):
+            return {**analysis, "degraded": True, "source": "local"}
+        return {**analysis, "source": "llm"}
+
+    return run_batch(documents, analyze_one, prescreen)
+
+
+@job_queue.handler("analyze_batch")
+async def _analyze_batch_job(payload: dict, progress) -> dict:
+    documents = [(d["filename"], base64.b64decode(d["data"])) for d in payload["documents"]]
+    events = list(payload.get("errors", []))
+    finished = 0
+    async for event in _batch_events(documents, payload["job_description"]):
+        events.append(event)
+        if event["type"] != "ranking":
+            finished += 1
+            await progress({"finished": finished, "total": len(documents)})
+    return {"events": events}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {**llm_cache.snapshot(), "llm_circuit": llm_breaker.state, "skill_resources": resource_catalog.snapshot()}
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus text exposition format (per worker process)
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 # --- DELETED: /history endpoint (it was reading from SQLite, which is not used) ---
 
 # --- REWRITTEN: MARKET TRENDS ENDPOINT with FIRESTORE CACHING ---
+# Firestore stays the cross-instance source of truth (24h). In front of it sits a
+# process-local copy: fresh for TRENDS_MEMORY_TTL_S, then served stale for up to
+# TRENDS_STALE_TTL_S while one background refresh runs (no thundering herd).
+TRENDS_FIRESTORE_TTL = timedelta(hours=24)
+TRENDS_MEMORY_TTL_S = float(os.getenv("TRENDS_MEMORY_TTL_S", "600"))
+TRENDS_STALE_TTL_S = float(os.getenv("TRENDS_STALE_TTL_S", str(24 * 3600)))
+
+
+async def _load_market_trends():
+    # Firestore + Groq are both blocking; run the whole lookup on the LLM pool,
+    # behind interactive and batch work.
+    with llm_priority(PRIORITY_BACKGROUND):
+        data, fresh_until = await run_llm(_market_trends_sync)
+    if fresh_until is None:
+        return data, 0  # error payload: never memoize
+    remaining = (fresh_until - datetime.now(timezone.utc)).total_seconds()
+    return data, min(TRENDS_MEMORY_TTL_S, max(remaining, 0))
+
+
+market_trends_memo = StaleWhileRevalidate(_load_market_trends, stale_ttl=TRENDS_STALE_TTL_S)
+
+
 @app.get("/market_trends")
-def generate_market_trends():
+async def generate_market_trends():
+    return await market_trends_memo.get()
+
+
+def _market_trends_sync():
+    """Returns (trends_dict, fresh_until) where fresh_until is None for error payloads."""
     
+    fs_db = get_firestore()
+
     # 1. Check Firestore Cache
     if fs_db:
         try:
             cache_ref = fs_db.collection("app_cache").document("market_trends")
-            cache_doc = cache_ref.get()
+            with stage("firestore_read"):
+                cache_doc = cache_ref.get()
             
             if cache_doc.exists:
                 cache_data = cache_doc.to_dict()
@@ -174,9 +461,9 @@ def generate_market_trends():
                 # Compare cache timestamp (UTC) with current UTC time
                 if cache_timestamp:
                     cache_age = datetime.now(timezone.utc) - cache_timestamp
-                    if cache_age < timedelta(hours=24):
+                    if cache_age < TRENDS_FIRESTORE_TTL:
                         print("--- DEBUG: Returning Firestore cached global trends. ---")
-                        return cache_data.get("data") # Return the stored dictionary
+                        return cache_data.get("data"), cache_timestamp + TRENDS_FIRESTORE_TTL # Return the stored dictionary
                         
         except Exception as e:
             print(f"--- WARNING: Firestore cache read failed: {e} ---")
@@ -192,30 +479,38 @@ def generate_market_trends():
             "Example: [\"Python\", \"React/Node.js\", \"Cloud Computing (AWS/Azure)\", \"Effective Communication\", ...]"
         )
         
-        response = groq_client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a global tech hiring analyst. Your output must be ONLY a valid JSON array of 10 items."},
-                {"role": "user", "content": prompt_content},
-            ],
-            temperature=0.5,
-            response_format={"type": "json_object"}
-        )
+        # Malformed JSON is repaired locally, then the model is asked again
+        top_skills_array = None
+        for json_attempt in range(LLM_JSON_RETRIES + 1):
+            response = create_chat_completion(
+                get_groq_client(),
+                "llm_trends",
+                model=GROQ_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a global tech hiring analyst. Your output must be ONLY a valid JSON array of 10 items."},
+                    {"role": "user", "content": prompt_content},
+                ],
+                temperature=0.5,
+                response_format={"type": "json_object"}
+            )
+
+            text = response.choices[0].message.content.strip()
 
-        text = response.choices[0].message.content.strip()
-        
-        if text.startswith("```json"):
-            text = text.replace("```json", "").replace("```", "").strip()
-            
-        try:
-            data = json.loads(text)
-            if isinstance(data, dict):
-                top_skills_array = next((v for v in data.values() if isinstance(v, list)), [])
-            else:
-                top_skills_array = data
-            
-        except json.JSONDecodeError:
-            top_skills_array = ["JSON Parsing Error"]
+            try:
+                data = repair_json(text)
+                if isinstance(data, dict):
+                    top_skills_array = next((v for v in data.values() if isinstance(v, list)), None)
+                elif isinstance(data, list):
+                    top_skills_array = data
+            except json.JSONDecodeError:
+                pass
+            if top_skills_array is not None:
+                break
+            print(f"--- WARNING: Market trends returned invalid JSON (attempt {json_attempt + 1}/{LLM_JSON_RETRIES + 1}) ---")
+
+        if top_skills_array is None:
+            # Not written to Firestore or memoized, so the next request tries again
+            return {"error": "Market trends response was not valid JSON", "top_skills": []}, None
         
         # Format the final result structure
         formatted_trends_dict = {
@@ -232,73 +527,116 @@ def generate_market_trends():
                     "data": formatted_trends_dict
                 }
                 cache_ref = fs_db.collection("app_cache").document("market_trends")
-                cache_ref.set(payload)
+                with stage("firestore_write"):
+                    cache_ref.set(payload)
                 print("--- DEBUG: Successfully updated Firestore cache. ---")
             except Exception as e:
                 print(f"--- WARNING: Firestore cache write failed: {e} ---")
         
-        return formatted_trends_dict
+        return formatted_trends_dict, datetime.now(timezone.utc) + TRENDS_FIRESTORE_TTL
 
-    except GroqError as e:
-        return {"error": f"Groq API Error: {str(e)}", "top_skills": []}
     except Exception as e:
-        return {"error": f"Error generating market trends: {str(e)}", "top_skills": []}
+        from groq import GroqError  # already loaded by get_groq_client()
+        if isinstance(e, GroqError):
+            return {"error": f"Groq API Error: {str(e)}", "top_skills": []}, None
+        return {"error": f"Error generating market trends: {str(e)}", "top_skills": []}, None
 # --- END REWRITTEN ENDPOINT ---
 
 @app.post("/optimize_resume/")
 async def http_optimize_resume(
-    resume_text: str = Form(...),
     job_description: str = Form(...),
-    missing_skills: str = Form(...) 
+    missing_skills: str = Form(...),
+    resume_text: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    stream: bool = Form(False),
+    job: bool = Form(False),
 ):
+    # Prefer the server-side handle from /analyze_resume/; raw text is the fallback
+    if document_id:
+        stored_text = await get_document(document_id)
+        if stored_text is not None:
+            resume_text = stored_text
+        elif not resume_text:
+            raise HTTPException(status_code=404, detail="Document expired or unknown; resend resume_text.")
+    if not resume_text:
+        raise HTTPException(status_code=422, detail="Provide document_id or resume_text.")
+
+    if job:
+        # The text itself is queued: document handles may expire before the job runs
+        return await _submit_job("optimize_resume", {"resume_text": resume_text, "job_description": job_description,
+                                                     "missing_skills": missing_skills})
+    if stream:
+        cache_key = optimize_cache_key(resume_text, job_description, missing_skills, GROQ_MODEL)
+        return _stream_llm_text(cache_key, stream_optimized_resume,
+                                (resume_text, job_description, missing_skills, get_groq_client(), GROQ_MODEL),
+                                optimize_cleaner())
     try:
-        # --- REVISED PROMPT FOR GROQ ---
-        prompt_content = f"""
-        You are a highly skilled Resume Editor. Your goal is to improve the provided resume text
-        to maximize its alignment with the JOB DESCRIPTION and address the MISSING SKILLS.
-
-        Your output MUST be a single block of markdown text, ready to be pasted into a resume.
-        DO NOT include any conversational filler, explanation, or notes.
-        DO NOT change anything from name, give exact same as extracted
-
-
-        ### Optimization Task:
-        1. **Rewrite** the 'Experience', 'Projects', and/or 'Summary' sections of the RESUME.
-        2. **Focus** on integrating terms from the JOB DESCRIPTION.
-        3. **Demonstrate** how the candidate's experience covers the technical skills and addresses the {missing_skills} gap by re-phrasing existing bullet points.
-
-        ### Optimization Rules:
-        * **Do NOT** invent or fabricate any new experience, projects, or dates.
-        * **MUST** use strong, quantifiable action verbs (e.g., "Led," "Developed," "Optimized").
-        * **Output MUST** be in Markdown format, preserving original headings (e.g., ## Projects).
-
-        --- INPUT DATA ---
-        RESUME TEXT:
-        {resume_text}
-
-        JOB DESCRIPTION:
-        {job_description}
-        """
-        # --- END REVISED PROMPT ---
-        # Use Groq client for chat completion
-        response = groq_client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[
-                # System message is crucial for tone and output format
-                {"role": "system", "content": "You are a professional Resume Editor. Output ONLY the rewritten resume sections in Markdown format."},
-                {"role": "user", "content": prompt_content},
-            ],
-            temperature=0.4, # Lowered for more precise, less creative rewriting
-        )
-
-        # Clean the response just in case
-        cleaned_text = response.choices[0].message.content.strip().replace("`markdown`", "").strip()
-        
-        return {"optimized_text": cleaned_text}
+        return await _optimize_text(resume_text, job_description, missing_skills)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _optimize_text(resume_text: str, job_description: str, missing_skills: str) -> dict:
+    cache_key = optimize_cache_key(resume_text, job_description, missing_skills, GROQ_MODEL)
+    cleaned_text = await llm_cache.run(cache_key, optimize_resume,
+                                       resume_text, job_description, missing_skills, get_groq_client(), GROQ_MODEL)
+    return {"optimized_text": cleaned_text}
+
+
+@job_queue.handler("optimize_resume")
+async def _optimize_job(payload: dict, progress) -> dict:
+    try:
+        return await _optimize_text(payload["resume_text"], payload["job_description"], payload["missing_skills"])
+    except CircuitOpenError as e:
+        # A queued job can simply wait for the provider to recover
+        raise RetryLater(e.retry_after, str(e))
 # --- END OF NEW ENDPOINT ---
 
+# --- JOB STATUS ---
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id.")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    # SSE: a "status" event whenever the job's status/progress changes, the last one carries the result
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id.")
+
+    async def events():
+        async for job in job_queue.events(job_id):
+            yield format_event({"type": "status", **job}, "sse")
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# --- ENTRY POINT ---
+# WEB_CONCURRENCY > 1 runs that many worker processes (uvicorn --workers), so
+# CPU-bound parsing uses every core. Workers share document handles, the LLM
+# cache, batch rate limits and the Groq RPM/TPM buckets through
+# SHARED_STORE=sqlite, set automatically here. Under gunicorn both must come
+# from the environment: SHARED_STORE=sqlite is required, and the worker count
+# must be given as WEB_CONCURRENCY (gunicorn's default for -w), not -w, since
+# utils/parser.py splits the cores between WEB_CONCURRENCY workers:
+#   SHARED_STORE=sqlite WEB_CONCURRENCY=4 gunicorn main:app -k uvicorn.workers.UvicornWorker
 if __name__ == "__main__":
-    print("Starting AI Resume Analyzer backend on [http://127.0.0.1:8000](http://127.0.0.1:8000)")
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    host = os.getenv("HOST", "127.0.0.1")
+    port = int(os.getenv("PORT", "8000"))
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    if workers > 1:
+        # Workers are spawned fresh and inherit this environment
+        os.environ["WEB_CONCURRENCY"] = str(workers)
+        os.environ.setdefault("SHARED_STORE", "sqlite")
+        if os.environ["SHARED_STORE"] != "sqlite":
+            print("--- WARNING: SHARED_STORE is not sqlite; document handles and caches are per worker. ---")
+    print(f"Starting AI Resume Analyzer backend on [http://{host}:{port}](http://{host}:{port}) with {workers} worker(s)")
+    if workers > 1:
+        uvicorn.run("main:app", host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(app, host=host, port=port)
\ No newline at end of file
@@ -0,0 +1,40 @@
+# tests/test_compactor.py
+from utils.compactor import CHARS_PER_TOKEN, compact_resume, compact_text
+
+
+def _paragraph(words: int) -> str:
+    return " ".join(f"word{i}" for i in range(words))
+
+
+def test_single_line_document_is_truncated_not_emptied():
+    # PDF text layers often come out as one long paragraph
+    text = _paragraph(2500)
+    assert len(text) > 1500 * CHARS_PER_TOKEN
+    out = compact_resume(text, token_budget=1500)
+    assert out == text[:1500 * CHARS_PER_TOKEN]
+
+
+def test_no_known_headings_keeps_the_full_budget():
+    lines = ["Jane Doe", "jane@example.com", "PROFESSIONAL EXPERIENCE & INTERNSHIPS"]
+    lines += [f"Built service {i} in Python and Go with Kubernetes on AWS" for i in range(200)]
+    lines.append("Skills: Python, Go, Kubernetes")
+    text = "\n".join(lines)
+    out = compact_resume(text, token_budget=1500)
+    # Not capped to the header share: the whole budget is used, from the top of the document
+    assert out == text[:1500 * CHARS_PER_TOKEN]
+
+
+def test_sections_truncate_the_line_that_does_not_fit():
+    text = "\n".join(["Jane Doe", "Skills", "Python, Go", "Experience", _paragraph(400)])
+    out = compact_text(text, token_budget=100)
+    assert out.startswith("Jane Doe\nSkills\nPython, Go\nExperience\nword0 word1")
+    assert 100 * CHARS_PER_TOKEN - 1 <= len(out) <= 100 * CHARS_PER_TOKEN
+
+
+def test_non_empty_input_never_compacts_to_empty():
+    for text in (_paragraph(50), "x" * 5000, "Skills\n" + "y" * 5000):
+        assert compact_text(text, token_budget=10)
+
+
+def test_short_text_is_only_normalized():
+    assert compact_resume("  Jane   Doe \n\n Skills \n Python ") == "Jane Doe\nSkills\nPython"
@@ -0,0 +1,44 @@
+# tests/test_llm.py
+import asyncio
+import threading
+
+import pytest
+
+from utils import llm
+from utils.scheduler import PriorityGate
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_finishes(monkeypatch):
+    monkeypatch.setattr(llm, "_gate", PriorityGate(1))
+    release = threading.Event()
+
+    def slow_call():
+        release.wait(5)
+        return "late"
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await llm.run_llm_with_timeout(0.05, slow_call)
+        # The thread is still running, so its slot is still taken
+        assert llm._gate._active == 1
+        waiter = asyncio.create_task(llm.run_llm_with_timeout(1.0, lambda: "next"))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        release.set()
+        assert await waiter == "next"
+        assert llm._gate._active == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        llm.shutdown_llm_executor()
+
+
+def test_call_within_timeout_returns_its_result(monkeypatch):
+    monkeypatch.setattr(llm, "_gate", PriorityGate(1))
+    try:
+        assert asyncio.run(llm.run_llm_with_timeout(1.0, lambda x: x * 2, 21)) == 42
+        assert llm._gate._active == 0
+    finally:
+        llm.shutdown_llm_executor()
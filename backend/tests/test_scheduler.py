@@ -0,0 +1,68 @@
+# tests/test_scheduler.py
+import asyncio
+
+from utils import shared_store
+from utils.scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, PriorityGate, TokenBucketScheduler
+
+
+def test_interactive_gets_free_slot_while_capped_batch_waits():
+    async def scenario():
+        gate = PriorityGate(16, {PRIORITY_BATCH: 12})
+        for _ in range(12):
+            await gate.acquire(PRIORITY_BATCH)
+        # Batch is at its cap: these queue even though 4 slots are free
+        queued = [asyncio.create_task(gate.acquire(PRIORITY_BATCH)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert gate.waiting == 3
+
+        await asyncio.wait_for(gate.acquire(PRIORITY_INTERACTIVE), timeout=0.5)
+        assert gate.waiting == 3
+
+        gate.release(PRIORITY_BATCH)
+        await asyncio.sleep(0)
+        assert sum(t.done() for t in queued) == 1
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_slots_go_by_priority_then_arrival():
+    async def scenario():
+        gate = PriorityGate(1)
+        await gate.acquire(PRIORITY_BATCH)
+        order = []
+
+        async def take(priority, name):
+            await gate.acquire(priority)
+            order.append(name)
+            gate.release(priority)
+
+        tasks = [asyncio.create_task(take(PRIORITY_BATCH, "batch")),
+                 asyncio.create_task(take(PRIORITY_INTERACTIVE, "interactive-1")),
+                 asyncio.create_task(take(PRIORITY_INTERACTIVE, "interactive-2"))]
+        await asyncio.sleep(0)
+        gate.release(PRIORITY_BATCH)
+        await asyncio.gather(*tasks)
+        assert order == ["interactive-1", "interactive-2", "batch"]
+
+    asyncio.run(scenario())
+
+
+def test_shared_buckets_are_one_quota_across_schedulers(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_store, "SHARED_STORE_PATH", str(tmp_path / "shared.sqlite3"))
+    monkeypatch.setattr(shared_store, "_slot_conn", None)
+    # Two workers' schedulers on one 2 RPM account
+    first = TokenBucketScheduler(rpm=2, tpm=0, shared_key="groq")
+    second = TokenBucketScheduler(rpm=2, tpm=0, shared_key="groq")
+    first.acquire(100)
+    second.acquire(100)
+    with first._levels():
+        now = first._now()
+        first._refill(now)
+        assert first._wait_needed(now, 100) > 20  # the quota is spent for both
+
+    second.pause(5)
+    with first._levels():
+        assert first._paused_until >= first._now() + 4
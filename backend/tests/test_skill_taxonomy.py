@@ -0,0 +1,18 @@
+# tests/test_skill_taxonomy.py
+from utils.skill_taxonomy import analyze_text, find_skills
+
+
+def test_analyze_text_returns_skills_languages_and_sections():
+    text = "Jane Doe\nTechnical Skills:\nPython, Docker\nLanguages\nEnglish and Spanish"
+    result = analyze_text(text)
+    assert result["skills"] == sorted(find_skills(text))
+    assert result["languages"] == ["English", "Spanish"]
+    assert [s["name"] for s in result["sections"]] == ["header", "skills", "languages"]
+    norm = result["text"]
+    skills = result["sections"][1]
+    assert norm[skills["start"]:skills["end"]] == "technical skills:\npython, docker\n"
+
+
+def test_analyze_text_without_headings_is_one_header():
+    assert analyze_text("Python dev")["sections"] == [{"name": "header", "start": 0, "end": 10}]
+    assert analyze_text("")["sections"] == []
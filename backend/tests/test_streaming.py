@@ -0,0 +1,44 @@
+# tests/test_streaming.py
+import random
+
+from utils.streaming import StreamCleaner, clean_text
+
+SAMPLES = [
+    "```markdown\n## Experience\n- Built **APIs** in Python\n```\n",
+    "  \n```\n## Skills\n* Python • Go\n```",
+    "Use the ``` fence for code blocks",
+    "Wrap it in ```",
+    "Line one\nends with ```",
+    "Text\n``\nmore",
+    "Closing fence\n   ```   \n\n",
+    "```",
+    "",
+    "Plain answer with no fences at all.\n\n",
+]
+
+
+def _streamed(text: str, rng: random.Random, **options) -> str:
+    cleaner = StreamCleaner(**options)
+    out, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        out.append(cleaner.feed(text[i:i + size]))
+        i += size
+    out.append(cleaner.finish())
+    return "".join(out)
+
+
+def test_streamed_output_matches_buffered_for_any_chunking():
+    rng = random.Random(1234)
+    for options in ({"strip_fences": True}, {"remove_chars": "*•"}, {}):
+        for text in SAMPLES:
+            whole = clean_text(text, **options)
+            for _ in range(50):
+                assert _streamed(text, rng, **options) == whole, (options, text)
+
+
+def test_only_a_fence_on_its_own_line_is_stripped():
+    assert clean_text("```markdown\nBody\n```", strip_fences=True) == "Body"
+    assert clean_text("Body\n  ```  ", strip_fences=True) == "Body"
+    assert clean_text("Wrap it in ```", strip_fences=True) == "Wrap it in ```"
+    assert clean_text("Line one\nends with ```", strip_fences=True) == "Line one\nends with ```"
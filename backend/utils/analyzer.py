@@ -1,27 +1,45 @@
 # utils/analyzer.py
-import os, json, re
-from groq import Groq
-from typing import Dict, Any
+import os, json, time
+from typing import Dict, Any, Optional, TYPE_CHECKING
+if TYPE_CHECKING:  # the Groq SDK is imported lazily by utils/clients.py
+    from groq import Groq
+from utils.llm import create_chat_completion
+from utils.metrics import stage, record_stage, LLM_DEGRADED
+from utils.resilience import repair_json, is_degradable, LLM_JSON_RETRIES
+from utils.cache import make_cache_key
+from utils.skill_matcher import analyze_skill_gap
+from utils.skill_taxonomy import local_skill_match, format_match_summary
+from utils.compactor import compact_resume, compact_job_description, RESUME_TOKEN_BUDGET, JD_TOKEN_BUDGET
 
 # No need for local config, client is passed from main.py
 # MODEL is still used but now defined in main.py
 
-# --- helper functions unchanged ---
-def extract_languages(text: str):
-    langs = re.findall(r'\b(English|Hindi|French|Spanish|German|Chinese|Tamil|Telugu|Arabic|Japanese)\b', text, re.I)
-    return list(sorted(set(l.title() for l in langs)))
+# Bump PROMPT_VERSION whenever the prompt changes; it is part of the LLM cache key.
+PROMPT_VERSION = "analyze-v3"
+TEMPERATURE = 0.1
 
-def extract_skills(text: str):
-    lines = re.findall(r'[A-Za-z+#]+', text)
-    return list(sorted(set(l.title() for l in lines if len(l) > 2)))
+# "full": resume packed into RESUME_TOKEN_BUDGET; "compact": a smaller budget,
+# relying on the deterministic matched/missing summary for skill coverage.
+ANALYZER_PROMPT_MODE = os.getenv("ANALYZER_PROMPT_MODE", "full")
+ANALYZER_COMPACT_TOKEN_BUDGET = int(os.getenv("ANALYZER_COMPACT_TOKEN_BUDGET", "600"))
+
+def _resume_budget() -> int:
+    return ANALYZER_COMPACT_TOKEN_BUDGET if ANALYZER_PROMPT_MODE == "compact" else RESUME_TOKEN_BUDGET
+
+def analysis_cache_key(resume_text: str, job_description: str, model: str) -> str:
+    return make_cache_key("analyze", model=model, prompt_version=PROMPT_VERSION, temperature=TEMPERATURE,
+                          resume_text=resume_text, job_description=job_description, extra=f"{ANALYZER_PROMPT_MODE}:{_resume_budget()}:{JD_TOKEN_BUDGET}")
 
 # --- analyzer ---
-# Added client: Groq and model: str to signature
-def analyze_resume(resume_text: str, job_description: str, client: Groq, model: str) -> Dict[str, Any]:
-    resume_langs = extract_languages(resume_text)
-    jd_langs = extract_languages(job_description)
-    resume_skills = extract_skills(resume_text)
-    jd_skills = extract_skills(job_description)
+# Added client: "Groq" and model: str to signature
+def analyze_resume(resume_text: str, job_description: str, client: "Groq", model: str,
+                   local_match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    build_start = time.perf_counter()
+    # Deterministic taxonomy match; grounds the LLM score and backs up missing fields
+    if local_match is None:
+        local_match = local_skill_match(resume_text, job_description)
+    resume_excerpt = compact_resume(resume_text, _resume_budget())
+    jd_excerpt = compact_job_description(job_description)
 
     # utils/analyzer.py (inside analyze_resume function)
 
@@ -42,10 +60,13 @@ The **STRICT JSON SCHEMA** is:
 
 ### INPUT DATA:
 RESUME TEXT:
-{resume_text[:6000]}
+{resume_excerpt}
 
 JOB DESCRIPTION:
-{job_description[:3000]}
+{jd_excerpt}
+
+LOCAL SKILL MATCH (keyword-based reference, verify against the text):
+{format_match_summary(local_match)}
 
 ### RULES FOR SCORING AND ANALYSIS:
 1. **SCORING (skill_match_pct):** Compute the score as **(Total Matched Items / Total Required Items in JD) * 100**. Do NOT give random scores.
@@ -57,24 +78,36 @@ JOB DESCRIPTION:
 7. DO NOT count adjectives like (a, an, the, or , of , on, etc.) as skills.
 8. You should be consistent with your answer and it should be fully accurate and according to what is given in resume and job description.
 """
+    record_stage("prompt_build", time.perf_counter() - build_start)
+    messages = [
+        {"role": "system", "content": "You are an expert HR evaluator. Your output must be ONLY a valid JSON object."},
+        {"role": "user", "content": prompt},
+    ]
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an expert HR evaluator. Your output must be ONLY a valid JSON object."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1, # Keep it low for structured output
-            response_format={"type": "json_object"} # Groq feature for JSON
-        )
-        
-        text = response.choices[0].message.content.strip()
-
-        # Try to parse the text, accommodating for code blocks
-        if text.startswith("```json"):
-            text = text.replace("```json", "").replace("```", "").strip()
-        
-        result = json.loads(text)
+        # Malformed JSON is repaired locally; only if that fails is the model asked again
+        result = None
+        for json_attempt in range(LLM_JSON_RETRIES + 1):
+            response = create_chat_completion(
+                client,
+                "llm_analyze",
+                model=model,
+                messages=messages,
+                temperature=TEMPERATURE, # Keep it low for structured output
+                response_format={"type": "json_object"} # Groq feature for JSON
+            )
+            text = response.choices[0].message.content.strip()
+            try:
+                with stage("json_parse"):
+                    parsed = repair_json(text)
+                if isinstance(parsed, dict):
+                    result = parsed
+                    break
+            except json.JSONDecodeError:
+                pass
+            print(f"--- WARNING: Analyzer returned invalid JSON (attempt {json_attempt + 1}/{LLM_JSON_RETRIES + 1}) ---")
+
+        if result is None:
+            return degraded_analysis_result(local_match, "JSON parse failed")
 
         # Failsafes (unchanged)
         if not result.get("weaknesses"):
@@ -82,14 +115,65 @@ JOB DESCRIPTION:
         if not result.get("suggestions"):
             result["suggestions"] = ["Include measurable results and technical projects"]
         if "skill_match_pct" not in result:
-            result["skill_match_pct"] = 50
+            result["skill_match_pct"] = local_match["skill_match_pct"] if local_match["skill_match_pct"] is not None else 50
 
         return result
 
-    except json.JSONDecodeError:
-        return {"error": "JSON parse failed", "raw": text}
     except Exception as e:
+        # Rate limits / outages / open circuit: answer from the local match instead of failing
+        if is_degradable(e):
+            return degraded_analysis_result(local_match, str(e))
         # Groq client will raise APIError if key is wrong, this catches it
         return {"error": str(e)}
 
-# quick test is now disabled as it requires the client object
\ No newline at end of file
+
+def degraded_analysis_result(local_match: Dict[str, Any], reason: str) -> Dict[str, Any]:
+    """local_analysis_result flagged as a fallback; never cached, so the next call retries the LLM."""
+    print(f"--- WARNING: Analyzer degraded to local skill match: {reason} ---")
+    LLM_DEGRADED.inc("llm_analyze")
+    return {**local_analysis_result(local_match), "degraded": True, "degraded_reason": reason}
+
+
+def local_analysis_result(local_match: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyzer-shaped result built only from the deterministic match (no LLM call)."""
+    matched, missing = local_match["matched_skills"], local_match["missing_skills"]
+    return {
+        "skill_match_pct": local_match["skill_match_pct"] or 0,
+        "summary": "",
+        "strengths": matched,
+        "missing_skills": missing,
+        "weaknesses": [f"Covers only {len(matched)} of {local_match['jd_skill_count']} skills required by the job description"],
+        "suggestions": [f"Build and showcase experience with: {', '.join(missing[:8])}"] if missing else [],
+    }
+
+
+def finalize_analysis(ai_result: Dict[str, Any], summary: str) -> Dict[str, Any]:
+    """
+    Turn a successful analyzer result into the response fields shared by
+    /analyze_resume/ and /analyze_batch/. Updates ai_result in place with the
+    final summary, missing skills and learning resources.
+    """
+    with stage("skill_gap"):
+        gap = analyze_skill_gap(ai_result)
+
+    ai_result["summary"] = summary
+    ai_result["missing_skills"] = gap.get("missing_skills", [])
+    ai_result["learning_resources"] = gap.get("learning_resources", {})
+
+    skill_match = ai_result.get("skill_match_pct") or ai_result.get("skill_match") or 0.0
+    try:
+        skill_match = float(skill_match)
+    except Exception:
+        skill_match = 0.0
+
+    return {
+        "skill_match": skill_match,
+        "missing_skills": ai_result.get("missing_skills", []) or [],
+        "strengths": ai_result.get("strengths", []) or [],
+        "weaknesses": ai_result.get("weaknesses", []) or [],
+        "suggestions": ai_result.get("suggestions", []) or [],
+        "learning_resources": ai_result.get("learning_resources", {}),
+        "summary": summary,
+    }
+
+# quick test is now disabled as it requires the client object
@@ -0,0 +1,223 @@
+# utils/batch.py
+import os
+import time
+import zlib
+import asyncio
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from utils.parser import extract_text
+from utils.uploads import MAX_UPLOAD_BYTES
+from utils.shared_store import reserve_slot
+from utils.metrics import stage
+
+# --- BATCH SCREENING: many resumes against one JD ---
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+BATCH_PARSE_CONCURRENCY = int(os.getenv("BATCH_PARSE_CONCURRENCY", "8"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+# Max LLM calls started per minute by a single batch (0 = unlimited)
+BATCH_REQUESTS_PER_MIN = float(os.getenv("BATCH_REQUESTS_PER_MIN", "120"))
+# Max LLM calls started per minute by all batches together, across workers (0 = unlimited)
+BATCH_GLOBAL_REQUESTS_PER_MIN = float(os.getenv("BATCH_GLOBAL_REQUESTS_PER_MIN", "0"))
+
+# Resumes whose deterministic skill match is below this skip the LLM entirely
+# (only when the JD names enough known skills for the score to mean something).
+BATCH_SKIP_BELOW_PCT = float(os.getenv("BATCH_SKIP_BELOW_PCT", "20"))
+BATCH_SKIP_MIN_JD_SKILLS = int(os.getenv("BATCH_SKIP_MIN_JD_SKILLS", "5"))
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+# (filename, source) pairs: bytes or a file-like ready for extract_text, or a ZipMember
+BatchDocument = Tuple[str, Any]
+
+
+class ZipMember:
+    """A resume inside an uploaded .zip, decompressed only when it is parsed."""
+
+    def __init__(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo):
+        self.archive = archive
+        self.info = info
+
+    def read(self) -> bytes:
+        try:
+            return self.archive.read(self.info)
+        except NotImplementedError as e:  # before RuntimeError, its base class
+            raise ValueError(f"Unsupported zip compression ({e})")
+        except RuntimeError:  # zipfile's "password required" error
+            raise ValueError("Encrypted file in zip archive")
+        except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+            raise ValueError(f"Corrupt file in zip archive ({e})")
+
+
+def read_document(source) -> bytes:
+    """Raw bytes of a batch document source (ValueError for unreadable zip members)."""
+    if isinstance(source, ZipMember):
+        return source.read()
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+    return source
+
+
+def should_skip_llm(local_match: Dict[str, Any]) -> bool:
+    pct = local_match["skill_match_pct"]
+    return (pct is not None and local_match["jd_skill_count"] >= BATCH_SKIP_MIN_JD_SKILLS
+            and pct < BATCH_SKIP_BELOW_PCT)
+
+
+class RateLimiter:
+    """
+    Spaces call starts at least 60/requests_per_min seconds apart. With a
+    shared_key the schedule lives in the shared store, so the limit holds
+    across every batch and every worker process.
+    """
+
+    def __init__(self, requests_per_min: float, shared_key: Optional[str] = None):
+        self.interval = 60.0 / requests_per_min if requests_per_min > 0 else 0.0
+        self.shared_key = shared_key
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        if self.shared_key:
+            wait = await asyncio.to_thread(reserve_slot, self.shared_key, self.interval)
+        else:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next_at - now
+                self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_global_limiter = RateLimiter(BATCH_GLOBAL_REQUESTS_PER_MIN, shared_key="batch_llm")
+
+
+def collect_documents(files: List[UploadFile]) -> Tuple[List[BatchDocument], List[Dict[str, Any]]]:
+    """
+    Flatten uploads (plain .pdf/.docx files and/or .zip archives of them) into
+    documents. Returns (documents, errors) where errors are per-file events.
+    Zip members are not decompressed here; each is read when it is parsed, so at
+    most BATCH_PARSE_CONCURRENCY of them are in memory at once.
+    """
+    documents: List[BatchDocument] = []
+    errors: List[Dict[str, Any]] = []
+
+    for upload in files:
+        name = upload.filename or "upload"
+        lower = name.lower()
+        if lower.endswith(".zip"):
+            try:
+                upload.file.seek(0)
+                # Left open: the members are read from it later (closing it does not close upload.file)
+                archive = zipfile.ZipFile(upload.file)
+            except (zipfile.BadZipFile, zipfile.LargeZipFile):
+                errors.append({"type": "error", "filename": name, "error": "Invalid zip archive"})
+                continue
+            for info in archive.infolist():
+                member = info.filename
+                if info.is_dir() or not member.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                if os.path.basename(member).startswith(("._", "~$")):
+                    continue  # macOS resource forks / Office lock files
+                if info.flag_bits & 0x1:
+                    errors.append({"type": "error", "filename": member, "error": "Encrypted file in zip archive"})
+                    continue
+                if info.file_size > MAX_UPLOAD_BYTES:
+                    errors.append({"type": "error", "filename": member, "error": "File too large"})
+                    continue
+                documents.append((member, ZipMember(archive, info)))
+        elif lower.endswith(SUPPORTED_EXTENSIONS):
+            size = upload.size if upload.size is not None else MAX_UPLOAD_BYTES
+            if size > MAX_UPLOAD_BYTES:
+                errors.append({"type": "error", "filename": name, "error": "File too large"})
+            else:
+                documents.append((name, upload.file))
+        else:
+            errors.append({"type": "error", "filename": name, "error": "Unsupported file format"})
+
+    if len(documents) > BATCH_MAX_FILES:
+        for name, _ in documents[BATCH_MAX_FILES:]:
+            errors.append({"type": "error", "filename": name, "error": f"Batch limit of {BATCH_MAX_FILES} files exceeded"})
+        documents = documents[:BATCH_MAX_FILES]
+    return documents, errors
+
+
+async def run_batch(
+    documents: List[BatchDocument],
+    analyze: Callable[[str], Awaitable[Dict[str, Any]]],
+    prescreen: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+    llm_concurrency: int = BATCH_LLM_CONCURRENCY,
+    requests_per_min: float = BATCH_REQUESTS_PER_MIN,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Parse every document in parallel and run analyze(resume_text) on each under
+    a concurrency cap and rate limit. prescreen(resume_text) may return a
+    finished result to skip the LLM for that resume entirely. Yields one event per document as soon as
+    it finishes ("result" with its provisional rank, or "error"), then a final
+    "ranking" event sorted by skill_match.
+    """
+    parse_sem = asyncio.Semaphore(BATCH_PARSE_CONCURRENCY)
+    llm_sem = asyncio.Semaphore(llm_concurrency)
+    limiter = RateLimiter(requests_per_min)
+
+    async def process(filename: str, source) -> Dict[str, Any]:
+        try:
+            async with parse_sem:
+                if isinstance(source, ZipMember):
+                    try:
+                        source = await run_in_threadpool(source.read)
+                    except ValueError as e:
+                        return {"type": "error", "filename": filename, "error": str(e)}
+                with stage("extract"):
+                    resume_text = await run_in_threadpool(extract_text, source, filename)
+        except Exception as e:
+            return {"type": "error", "filename": filename, "error": f"File parsing error: {str(e)}"}
+        if not resume_text:
+            return {"type": "error", "filename": filename, "error": "No text could be extracted"}
+
+        local_result = prescreen(resume_text) if prescreen else None
+        if local_result is not None:
+            return {"type": "result", "filename": filename, **local_result}
+
+        async with llm_sem:
+            await limiter.acquire()
+            await _global_limiter.acquire()
+            try:
+                result = await analyze(resume_text)
+            except Exception as e:
+                return {"type": "error", "filename": filename, "error": f"Analyzer exception: {str(e)}"}
+        if "error" in result:
+            return {"type": "error", "filename": filename, "error": result["error"]}
+        return {"type": "result", "filename": filename, **result}
+
+    tasks = [asyncio.ensure_future(process(name, source)) for name, source in documents]
+    completed: List[Dict[str, Any]] = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            event = await next_done
+            if event["type"] == "result":
+                completed.append(event)
+                # Provisional rank among the resumes finished so far
+                event["rank"] = 1 + sum(1 for r in completed if r["skill_match"] > event["skill_match"])
+            yield event
+    finally:
+        # Client went away mid-stream: don't keep spending LLM calls
+        for task in tasks:
+            task.cancel()
+
+    completed.sort(key=lambda r: r["skill_match"], reverse=True)
+    yield {
+        "type": "ranking",
+        "total": len(documents),
+        "succeeded": len(completed),
+        "results": [
+            {"rank": i + 1, "filename": r["filename"], "skill_match": r["skill_match"]}
+            for i, r in enumerate(completed)
+        ],
+    }
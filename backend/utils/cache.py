@@ -0,0 +1,330 @@
+# utils/cache.py
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from utils.llm import run_llm_with_timeout
+from utils.metrics import stage, LLM_CACHE_LOOKUPS
+
+# --- CONTENT-ADDRESSED LLM RESULT CACHE ---
+# Keys are a hash of (namespace, normalized resume text, JD, model, prompt version,
+# temperature), so re-uploading the same resume against the same JD is free.
+# Bumping a module's PROMPT_VERSION (or LLM_CACHE_VERSION for everything)
+# changes every key, which invalidates old entries without touching the store.
+
+LLM_CACHE_VERSION = os.getenv("LLM_CACHE_VERSION", "1")
+LLM_CACHE_TTL_S = int(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WS_RE.sub(" ", text or "").strip()
+
+
+def make_cache_key(namespace: str, *, model: str, prompt_version: str, temperature: float,
+                   resume_text: str = "", job_description: str = "", extra: str = "") -> str:
+    h = hashlib.sha256()
+    for part in (LLM_CACHE_VERSION, namespace, model, prompt_version, repr(float(temperature)),
+                 normalize_text(resume_text), normalize_text(job_description), extra):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return f"{namespace}:{h.hexdigest()}"
+
+
+# ---------- BACKENDS ----------
+# Every backend stores JSON strings, so callers always get a fresh copy back
+# and can mutate results (main.py does) without corrupting the cache.
+
+class MemoryCache:
+    """In-process LRU with TTL and a size bound."""
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024, ttl: int = LLM_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    On-disk cache; survives restarts and is shared by every worker process
+    pointing at the same file (WAL mode, one connection per process).
+    """
+    blocking = True
+
+    def __init__(self, path: str = "llm_cache.sqlite3", ttl: int = LLM_CACHE_TTL_S, table: str = "llm_cache"):
+        self.path = path
+        self.ttl = ttl
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Reconnect after a fork: SQLite connections must not cross processes
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                         (key, value, time.time() + self.ttl))
+            self._writes += 1
+            if self._writes % 256 == 0:
+                conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.commit()
+
+
+class FirestoreCache:
+    """
+    Uses the same Firestore client as the market_trends cache. fs_db may be the
+    client itself or a zero-argument factory, resolved on first use.
+    """
+    blocking = True
+
+    def __init__(self, fs_db, collection: str = "llm_cache", ttl: int = LLM_CACHE_TTL_S):
+        self._fs_db = fs_db
+        self.collection = collection
+        self.ttl = ttl
+
+    @property
+    def fs_db(self):
+        if callable(self._fs_db):
+            self._fs_db = self._fs_db()
+            if self._fs_db is None:
+                raise RuntimeError("Firestore client failed to initialize")
+        return self._fs_db
+
+    def get(self, key: str) -> Optional[str]:
+        with stage("firestore_read"):
+            doc = self.fs_db.collection(self.collection).document(key).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        expires_at = data.get("expires_at")
+        if expires_at and expires_at < datetime.now(timezone.utc):
+            return None
+        return data.get("value")
+
+    def set(self, key: str, value: str):
+        with stage("firestore_write"):
+            self.fs_db.collection(self.collection).document(key).set({
+                "value": value,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+            })
+
+    def clear(self):
+        for doc in self.fs_db.collection(self.collection).stream():
+            doc.reference.delete()
+
+
+# ---------- FRONT END ----------
+
+class LLMCache:
+    """Backend-agnostic cache with hit/miss counters, used by every LLM-backed route."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, field: str):
+        ns = self.stats.setdefault(namespace, {"hits": 0, "misses": 0, "errors": 0})
+        ns[field] += 1
+        LLM_CACHE_LOOKUPS.inc(namespace, field)
+
+    async def _call_backend(self, method: Callable, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def run(self, key: str, func: Callable[..., Any], *args,
+                  timeout: Optional[float] = None,
+                  should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached result for key, or run func on the LLM pool and store it.
+        Results for which should_cache(result) is False (errors) are never stored.
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        result = await run_llm_with_timeout(timeout, func, *args)
+        if should_cache is None or should_cache(result):
+            await self.set(key, result)
+        return result
+
+    async def get(self, key: str) -> Any:
+        """Cached value for key (counted as a hit or miss), or None."""
+        if self.backend is None:
+            return None
+        namespace = key.split(":", 1)[0]
+        try:
+            cached = await self._call_backend(self.backend.get, key)
+        except Exception as e:
+            print(f"--- WARNING: LLM cache read failed: {e} ---")
+            self._count(namespace, "errors")
+            cached = None
+
+        if cached is None:
+            self._count(namespace, "misses")
+            return None
+        self._count(namespace, "hits")
+        return json.loads(cached)
+
+    async def set(self, key: str, value: Any):
+        if self.backend is None:
+            return
+        try:
+            await self._call_backend(self.backend.set, key, json.dumps(value))
+        except Exception as e:
+            print(f"--- WARNING: LLM cache write failed: {e} ---")
+            self._count(key.split(":", 1)[0], "errors")
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        hits = sum(ns["hits"] for ns in self.stats.values())
+        misses = sum(ns["misses"] for ns in self.stats.values())
+        total = hits + misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "namespaces": self.stats,
+        }
+
+
+def build_llm_cache(backend_name: Optional[str] = None, fs_db=None) -> LLMCache:
+    """
+    Pick a backend from LLM_CACHE_BACKEND: memory, sqlite, firestore or none.
+    Defaults to sqlite when SHARED_STORE=sqlite (multi-worker), memory otherwise.
+    """
+    from utils.shared_store import SHARED_STORE
+
+    default = "sqlite" if SHARED_STORE == "sqlite" else "memory"
+    name = (backend_name or os.getenv("LLM_CACHE_BACKEND", default)).lower()
+    if name == "none":
+        return LLMCache(None)
+    if name == "sqlite":
+        return LLMCache(SQLiteCache(os.getenv("LLM_CACHE_SQLITE_PATH", "llm_cache.sqlite3")))
+    if name == "firestore":
+        if fs_db is not None:
+            return LLMCache(FirestoreCache(fs_db))
+        print("--- WARNING: LLM_CACHE_BACKEND=firestore but Firestore is disabled. Using memory cache. ---")
+    return LLMCache(MemoryCache(int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))))
+
+
+# ---------- SINGLE-FLIGHT / STALE-WHILE-REVALIDATE MEMO ----------
+
+class StaleWhileRevalidate:
+    """
+    Process-local memo for one expensive value (e.g. /market_trends).
+
+    loader is an async callable returning (value, ttl_seconds); ttl <= 0 means
+    "do not memoize" (used for error payloads). While fresh, get() is a plain
+    attribute read. Once expired, the stale copy is still served for up to
+    stale_ttl seconds while a single background refresh runs. Concurrent
+    callers with nothing to serve all await the same in-flight load.
+    """
+
+    def __init__(self, loader: Callable[[], Any], stale_ttl: float):
+        self.loader = loader
+        self.stale_ttl = stale_ttl
+        self._value: Any = None
+        self._expires_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def _load(self):
+        try:
+            value, ttl = await self.loader()
+            if ttl and ttl > 0:
+                self._value = value
+                self._expires_at = time.monotonic() + ttl
+            return value
+        finally:
+            self._inflight = None
+
+    def _refresh(self) -> asyncio.Task:
+        # Single-flight: every caller shares the same task
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._load())
+            self._inflight.add_done_callback(_log_refresh_failure)
+        return self._inflight
+
+    async def get(self) -> Any:
+        now = time.monotonic()
+        if self._value is not None:
+            if now < self._expires_at:
+                return self._value
+            if now < self._expires_at + self.stale_ttl:
+                self._refresh()
+                return self._value
+        return await asyncio.shield(self._refresh())
+
+    def invalidate(self):
+        self._value = None
+        self._expires_at = 0.0
+
+
+def _log_refresh_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"--- WARNING: Background cache refresh failed: {task.exception()} ---")
@@ -0,0 +1,62 @@
+# utils/clients.py
+import os
+import threading
+
+# --- LAZY EXTERNAL CLIENTS ---
+# Building the Groq client and initializing firebase_admin/Firestore costs
+# hundreds of milliseconds of imports and setup. Neither is needed for GET /,
+# so both are created on first use (or by the optional startup prewarm in
+# main.py) instead of at import time.
+
+_lock = threading.Lock()
+_groq_client = None
+_fs_db = None
+_firestore_initialized = False
+
+
+def get_groq_client():
+    global _groq_client
+    if _groq_client is None:
+        with _lock:
+            if _groq_client is None:
+                from groq import Groq
+                # Retries are ours (utils/resilience.py), so the SDK must not add its own
+                _groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
+    return _groq_client
+
+
+def firestore_configured() -> bool:
+    """Cheap check (no imports) for whether get_firestore() can return a client."""
+    path = os.getenv("FIREBASE_SERVICE_ACCOUNT_FILE")
+    return bool(path) and os.path.exists(path)
+
+
+def get_firestore():
+    """Firestore client, or None when Firebase is not configured or failed to initialize."""
+    global _fs_db, _firestore_initialized
+    if _firestore_initialized:
+        return _fs_db
+    with _lock:
+        if _firestore_initialized:
+            return _fs_db
+        try:
+            # We'll get the FILEPATH from an environment variable
+            service_account_filepath = os.getenv("FIREBASE_SERVICE_ACCOUNT_FILE")
+
+            if service_account_filepath and os.path.exists(service_account_filepath):
+                import firebase_admin
+                from firebase_admin import credentials, firestore
+
+                cred = credentials.Certificate(service_account_filepath)
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app(cred)
+                _fs_db = firestore.client()
+                print("--- DEBUG: Firebase Admin SDK initialized successfully from file. ---")
+            elif service_account_filepath:
+                print(f"--- ERROR: FIREBASE_SERVICE_ACCOUNT_FILE path specified ('{service_account_filepath}'), but file not found. Caching disabled. ---")
+            else:
+                print("--- WARNING: FIREBASE_SERVICE_ACCOUNT_FILE not set in .env. Firestore caching will be disabled. ---")
+        except Exception as e:
+            print(f"--- ERROR: Failed to initialize Firebase Admin from file: {e} ---")
+        _firestore_initialized = True
+    return _fs_db
@@ -0,0 +1,135 @@
+# utils/compactor.py
+import os
+import re
+import hashlib
+from typing import Dict, List, Tuple
+
+from utils.cache import MemoryCache
+from utils.skill_taxonomy import heading_section
+
+# --- TOKEN-BUDGETED RESUME COMPACTION ---
+# Raw extracted text is full of whitespace runs, repeated headers/footers and
+# boilerplate, and a blind [:6000] slice can drop the Skills section entirely.
+# compact_resume() normalizes the text, splits it into sections and packs the
+# most useful sections into a token budget, keeping the original order.
+
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "1500"))
+JD_TOKEN_BUDGET = int(os.getenv("JD_TOKEN_BUDGET", "750"))
+CHARS_PER_TOKEN = 4  # rough average for English text with Llama tokenizers
+
+# Section priority when the budget is tight (lower packs first)
+SECTION_PRIORITY = {
+    "header": 0,
+    "skills": 1,
+    "summary": 2,
+    "experience": 3,
+    "projects": 4,
+    "education": 5,
+    "certifications": 6,
+    "achievements": 7,
+    "languages": 8,
+    "other": 9,
+}
+# The header (name/contact block before the first heading) never takes more than this share
+HEADER_MAX_SHARE = 0.1
+
+_SPACES_RE = re.compile(r"[ \t ​]+")
+_BULLET_RE = re.compile(r"^[•●▪◦■\-\*–]\s*")
+
+_compaction_cache = MemoryCache(max_entries=int(os.getenv("COMPACTION_CACHE_ENTRIES", "512")))
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_lines(text: str) -> List[str]:
+    """Collapse whitespace, drop empty lines and exact (case-insensitive) duplicates."""
+    seen = set()
+    lines = []
+    for raw in (text or "").splitlines():
+        line = _SPACES_RE.sub(" ", raw).strip()
+        if not line:
+            continue
+        key = _BULLET_RE.sub("", line).lower()
+        if key in seen:
+            continue  # repeated page headers/footers, duplicated bullets
+        seen.add(key)
+        lines.append(line)
+    return lines
+
+
+def split_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """[(section_name, lines)] in document order; text before the first heading is the header."""
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in lines:
+        section = heading_section(line)
+        if section:
+            sections.append((section, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, body) for name, body in sections if body]
+
+
+def _pack(sections: List[Tuple[str, List[str]]], budget_chars: int) -> str:
+    if len(sections) < 2:
+        # No known headings: nothing to prioritize, keep the start of the document
+        return "\n".join(line for _, body in sections for line in body)[:budget_chars]
+
+    order = sorted(range(len(sections)), key=lambda i: SECTION_PRIORITY.get(sections[i][0], 9))
+    kept: Dict[int, List[str]] = {}
+    remaining = budget_chars
+    for i in order:
+        name, body = sections[i]
+        allowance = min(remaining, int(budget_chars * HEADER_MAX_SHARE)) if name == "header" else remaining
+        taken, used = [], 0
+        for line in body:
+            cost = len(line) + 1
+            if used + cost > allowance:
+                # Truncate the line that does not fit instead of dropping it
+                room = allowance - used - 1
+                if room > 0:
+                    taken.append(line[:room])
+                    used += room + 1
+                break
+            taken.append(line)
+            used += cost
+        if taken:
+            kept[i] = taken
+            remaining -= used
+        if remaining <= 0:
+            break
+    # Re-emit in original document order
+    return "\n".join("\n".join(kept[i]) for i in sorted(kept))
+
+
+def compact_text(text: str, token_budget: int, sectioned: bool = True) -> str:
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    digest = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    cache_key = f"{digest}:{token_budget}:{int(sectioned)}"
+    cached = _compaction_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    lines = normalize_lines(text)
+    if sum(len(l) + 1 for l in lines) <= budget_chars:
+        result = "\n".join(lines)
+    elif sectioned:
+        result = _pack(split_sections(lines), budget_chars)
+    else:
+        result = ""
+    if not result:
+        # Never hand the LLM an empty resume for a non-empty document
+        result = "\n".join(lines)[:budget_chars]
+
+    _compaction_cache.set(cache_key, result)
+    return result
+
+
+def compact_resume(resume_text: str, token_budget: int = RESUME_TOKEN_BUDGET) -> str:
+    """Shared by analyzer, summary and optimizer; cached per document hash + budget."""
+    return compact_text(resume_text, token_budget)
+
+
+def compact_job_description(job_description: str, token_budget: int = JD_TOKEN_BUDGET) -> str:
+    return compact_text(job_description, token_budget, sectioned=False)
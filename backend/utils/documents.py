@@ -0,0 +1,41 @@
+# utils/documents.py
+import os
+import asyncio
+import hashlib
+from typing import Optional
+
+from utils.shared_store import shared_kv
+
+# --- SERVER-SIDE DOCUMENT HANDLES ---
+# /analyze_resume/ stores the parsed resume text under a content-hash ID so
+# clients can refer to it (e.g. in /optimize_resume/) instead of posting the
+# whole text back. Handles expire after DOCUMENT_TTL_S; clients fall back to
+# sending resume_text when a handle is gone. With SHARED_STORE=sqlite a handle
+# issued by one worker resolves on every other worker.
+
+DOCUMENT_TTL_S = int(os.getenv("DOCUMENT_TTL_S", "3600"))
+DOCUMENT_MAX_ENTRIES = int(os.getenv("DOCUMENT_MAX_ENTRIES", "2048"))
+
+_documents = shared_kv("documents", max_entries=DOCUMENT_MAX_ENTRIES, ttl=DOCUMENT_TTL_S)
+
+
+def document_id_for(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+async def _call_store(method, *args):
+    # SQLite-backed handles (SHARED_STORE=sqlite) do disk I/O: keep it off the event loop
+    if _documents.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+async def store_document(text: str) -> str:
+    """Store parsed resume text; returns its handle. Re-storing refreshes the TTL."""
+    doc_id = document_id_for(text)
+    await _call_store(_documents.set, doc_id, text)
+    return doc_id
+
+
+async def get_document(doc_id: str) -> Optional[str]:
+    return await _call_store(_documents.get, doc_id)
@@ -0,0 +1,319 @@
+# utils/jobs.py
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from utils.metrics import JOBS_TOTAL
+
+# --- ASYNC JOB QUEUE ---
+# Opt-in alternative to holding an HTTP connection for the whole LLM round trip:
+# a route called with job=true stores a job row and answers 202 with its id.
+# JOB_WORKERS coroutines per process claim jobs from a SQLite table (WAL, so
+# every worker process shares it and it survives restarts), run the same code
+# as the synchronous route and store the result for GET /jobs/{id} or the
+# GET /jobs/{id}/events SSE stream.
+# A claim is a lease: while a handler runs, its worker renews the lease every
+# JOB_LEASE_S / 3 (and on every progress update); if its process dies, the job
+# is picked up again once JOB_LEASE_S has passed, up to JOB_MAX_ATTEMPTS times.
+# Every claim gets an owner token, and progress/result writes only land while
+# the writer still owns the job, so a job is never finished by two workers. At most JOB_MAX_PENDING
+# jobs may be queued or running; past that, submit() raises QueueFullError
+# (503 + Retry-After) instead of piling up more work.
+
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))          # per process; 0 = only accept jobs here
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100"))
+JOB_LEASE_S = float(os.getenv("JOB_LEASE_S", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RESULT_TTL_S = float(os.getenv("JOB_RESULT_TTL_S", str(24 * 3600)))
+JOB_POLL_S = float(os.getenv("JOB_POLL_S", "0.5"))
+
+TERMINAL_STATUSES = ("done", "failed")
+
+# handler(payload, progress) -> JSON-serializable result; progress(dict) publishes partial state
+Progress = Callable[[Dict[str, Any]], Awaitable[None]]
+Handler = Callable[[Dict[str, Any], Progress], Awaitable[Any]]
+
+
+class QueueFullError(Exception):
+    def __init__(self, pending: int, retry_after: float):
+        super().__init__(f"Job queue is full ({pending} pending); retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class RetryLater(Exception):
+    """Raised by a handler to put its job back in the queue for delay seconds (e.g. LLM circuit open)."""
+
+    def __init__(self, delay: float, reason: str = ""):
+        super().__init__(reason or f"retry in {delay:.0f}s")
+        self.delay = delay
+
+
+class JobQueue:
+    def __init__(self, path: str = JOB_STORE_PATH, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING):
+        self.path = path
+        self.workers = workers
+        self.max_pending = max_pending
+        self._handlers: Dict[str, Handler] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished = 0
+
+    def handler(self, kind: str):
+        """Decorator registering the coroutine that runs jobs of this kind."""
+        def register(func: Handler) -> Handler:
+            self._handlers[kind] = func
+            return func
+        return register
+
+    # ---------- SQLITE (blocking; called through asyncio.to_thread) ----------
+
+    def _connection(self) -> sqlite3.Connection:
+        # Reconnect after a fork; autocommit so BEGIN IMMEDIATE controls transactions
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                "payload TEXT, result TEXT, error TEXT, progress TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL, available_at REAL, started_at REAL, finished_at REAL, lease_until REAL, lease_owner TEXT)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "lease_owner" not in columns:  # stores created before leases had owners
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_owner TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, available_at)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _retry_after(self, conn: sqlite3.Connection) -> float:
+        # Roughly how long until one running job finishes and frees a place
+        row = conn.execute("SELECT AVG(finished_at - started_at) FROM (SELECT finished_at, started_at FROM jobs "
+                           "WHERE status = 'done' ORDER BY finished_at DESC LIMIT 20)").fetchone()
+        avg = row[0] if row and row[0] else 5.0
+        return max(1.0, min(60.0, avg / max(1, self.workers)))
+
+    def _submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                pending = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+                if pending >= self.max_pending:
+                    retry_after = self._retry_after(conn)
+                    conn.execute("ROLLBACK")
+                    raise QueueFullError(pending, retry_after)
+                conn.execute("INSERT INTO jobs (id, kind, status, payload, created_at, available_at) "
+                             "VALUES (?, ?, 'queued', ?, ?, ?)", (job_id, kind, json.dumps(payload), now, now))
+                conn.execute("COMMIT")
+            except QueueFullError:
+                raise
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return {"job_id": job_id, "kind": kind, "status": "queued", "queue_position": pending + 1}
+
+    def _claim(self) -> Optional[tuple]:
+        """Atomically take the oldest runnable job: queued, or running with an expired lease."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            while True:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute(
+                        "SELECT id, kind, payload, attempts, status FROM jobs "
+                        "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_until < ?) "
+                        "ORDER BY available_at LIMIT 1", (now, now)).fetchone()
+                    if row is None:
+                        conn.execute("COMMIT")
+                        return None
+                    job_id, kind, payload, attempts, status = row
+                    if attempts >= JOB_MAX_ATTEMPTS:
+                        reason = "worker lost" if status == "running" else "too many attempts"
+                        conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                                     (f"Job abandoned after {attempts} attempts ({reason})", now, job_id))
+                        conn.execute("COMMIT")
+                        JOBS_TOTAL.inc(kind, "failed")
+                        continue
+                    owner = uuid.uuid4().hex
+                    conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, "
+                                 "lease_until = ?, lease_owner = ? WHERE id = ?",
+                                 (now, now + JOB_LEASE_S, owner, job_id))
+                    conn.execute("COMMIT")
+                    return job_id, kind, json.loads(payload), owner
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+    # The writes below only apply while `owner` still holds the job's lease; they return False otherwise
+
+    def _finish(self, job_id: str, owner: str, result: Any = None, error: Optional[str] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL, "
+                "lease_owner = NULL WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                ("failed" if error else "done", None if error else json.dumps(result), error, now, job_id, owner),
+            ).rowcount
+            self._finished += 1
+            if self._finished % 256 == 0:
+                conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                             (now - JOB_RESULT_TTL_S,))
+        return updated > 0
+
+    def _requeue(self, job_id: str, owner: str, delay: float = 0.0, error: Optional[str] = None,
+                 refund: bool = False) -> bool:
+        with self._lock:
+            return self._connection().execute(
+                "UPDATE jobs SET status = 'queued', available_at = ?, lease_until = NULL, lease_owner = NULL, "
+                "error = ?, attempts = attempts - ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (time.time() + delay, error, 1 if refund else 0, job_id, owner)).rowcount > 0
+
+    def _renew(self, job_id: str, owner: str, progress: Optional[Dict[str, Any]] = None) -> bool:
+        """Extend the lease (and optionally publish progress)."""
+        lease_until = time.time() + JOB_LEASE_S
+        with self._lock:
+            return self._connection().execute(
+                "UPDATE jobs SET lease_until = ?, progress = COALESCE(?, progress) "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (lease_until, None if progress is None else json.dumps(progress), job_id, owner)).rowcount > 0
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT id, kind, status, result, error, progress, attempts, created_at, started_at, "
+                               "finished_at, available_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = {"job_id": row[0], "kind": row[1], "status": row[2], "attempts": row[6],
+                   "created_at": row[7], "started_at": row[8], "finished_at": row[9]}
+            if row[2] == "queued":
+                job["queue_position"] = 1 + conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND available_at < ?", (row[10],)).fetchone()[0]
+        if row[3] is not None:
+            job["result"] = json.loads(row[3])
+        if row[4]:
+            job["error"] = row[4]
+        if row[5]:
+            job["progress"] = json.loads(row[5])
+        return job
+
+    # ---------- ASYNC API ----------
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = await asyncio.to_thread(self._submit, kind, payload)
+        JOBS_TOTAL.inc(kind, "submitted")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Job snapshots whenever status/progress changes, ending with the finished job."""
+        last = None
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            marker = (job["status"], json.dumps(job.get("progress"), sort_keys=True), job.get("queue_position"))
+            if marker != last:
+                last = marker
+                yield job
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(JOB_POLL_S)
+
+    async def _heartbeat(self, job_id: str, owner: str, task: asyncio.Task):
+        # Keeps the lease alive while the handler runs; stops the handler if the lease was lost
+        while True:
+            await asyncio.sleep(JOB_LEASE_S / 3)
+            try:
+                renewed = await asyncio.to_thread(self._renew, job_id, owner)
+            except sqlite3.Error as e:
+                print(f"--- WARNING: Job {job_id} lease renewal failed: {e} ---")
+                continue
+            if not renewed:
+                print(f"--- WARNING: Job {job_id} lease lost to another worker; stopping this run. ---")
+                task.cancel()
+                return
+
+    async def _run(self, job_id: str, kind: str, payload: Dict[str, Any], owner: str):
+        handler = self._handlers.get(kind)
+        if handler is None:
+            await asyncio.to_thread(self._finish, job_id, owner, None, f"No handler for job kind '{kind}'")
+            return
+
+        async def progress(data: Dict[str, Any]):
+            await asyncio.to_thread(self._renew, job_id, owner, data)
+
+        task = asyncio.create_task(handler(payload, progress))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, owner, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if heartbeat.done():
+                return  # lease lost: the job belongs to another worker now
+            # Shutting down: hand the job back without burning an attempt
+            task.cancel()
+            self._requeue(job_id, owner, refund=True)
+            raise
+        except RetryLater as e:
+            print(f"--- WARNING: Job {job_id} ({kind}) deferred {e.delay:.0f}s: {e} ---")
+            if await asyncio.to_thread(self._requeue, job_id, owner, e.delay, str(e)):
+                JOBS_TOTAL.inc(kind, "deferred")
+            return
+        except Exception as e:
+            print(f"--- ERROR: Job {job_id} ({kind}) failed: {e} ---")
+            if await asyncio.to_thread(self._finish, job_id, owner, None, str(e) or type(e).__name__):
+                JOBS_TOTAL.inc(kind, "failed")
+            return
+        finally:
+            heartbeat.cancel()
+        if await asyncio.to_thread(self._finish, job_id, owner, result):
+            JOBS_TOTAL.inc(kind, "done")
+        else:
+            print(f"--- WARNING: Job {job_id} ({kind}) finished after losing its lease; result dropped. ---")
+
+    async def _worker(self):
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self._claim)
+            except sqlite3.Error as e:
+                print(f"--- WARNING: Job queue claim failed: {e} ---")
+                claimed = None
+            if claimed is None:
+                # Also polls, for jobs submitted by other processes and expired leases
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_S * 4)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(*claimed)
+
+    def start(self):
+        """Start this process's workers (call from the app lifespan, on the event loop)."""
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,276 @@
+# utils/llm.py
+import os
+import asyncio
+import functools
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from utils.metrics import (stage, record_stage, record_usage, LLM_IN_FLIGHT, LLM_WAITING, LLM_RATE_WAIT,
+                           LLM_RETRIES, LLM_HEDGES)
+from utils.resilience import (LLM_MAX_RETRIES, LLM_RETRY_AFTER_MAX_S, LLM_HEDGE_AFTER_S, llm_breaker,
+                              is_transient, retry_after_s, backoff_s)
+from utils.scheduler import (PRIORITY_NAMES, PriorityGate, build_llm_gate, current_priority,
+                             estimate_request_tokens, llm_rate_scheduler)
+
+# --- SHARED LLM EXECUTION LAYER ---
+# The Groq SDK client is synchronous, so every chat completion blocks the
+# calling thread for the whole round trip. Routes must never call it on the
+# event loop directly; they go through run_llm(), which offloads the call to a
+# dedicated, bounded thread pool and caps how many LLM calls are in flight.
+# Slots and the account's RPM/TPM budget are handed out by priority class
+# (see utils/scheduler.py).
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_THREAD_POOL_SIZE = int(os.getenv("LLM_THREAD_POOL_SIZE", str(LLM_MAX_CONCURRENCY)))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_gate: Optional[PriorityGate] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=LLM_THREAD_POOL_SIZE, thread_name_prefix="llm")
+    return _executor
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    # Hedged attempts run here while the LLM pool thread waits for the first answer
+    global _hedge_executor
+    if _hedge_executor is None:
+        _hedge_executor = ThreadPoolExecutor(max_workers=2 * LLM_THREAD_POOL_SIZE, thread_name_prefix="llm-hedge")
+    return _hedge_executor
+
+
+def _get_gate() -> PriorityGate:
+    # Created lazily so it binds to the running event loop, not import time.
+    global _gate
+    if _gate is None:
+        _gate = build_llm_gate(LLM_MAX_CONCURRENCY)
+    return _gate
+
+
+def _attempt(client, stage_name: str, kwargs: dict):
+    # Every attempt (retry or hedge) is a request against the account limits
+    charged = 0
+    if llm_rate_scheduler.enabled:
+        priority = current_priority()
+        start = time.perf_counter()
+        charged = llm_rate_scheduler.acquire(
+            estimate_request_tokens(kwargs.get("messages") or [], kwargs.get("max_tokens")), priority)
+        waited = time.perf_counter() - start
+        LLM_RATE_WAIT.observe(waited, PRIORITY_NAMES[priority])
+        record_stage("llm_rate_wait", waited)
+    with stage(stage_name):
+        response = client.chat.completions.create(**kwargs)
+    usage = getattr(response, "usage", None)
+    if usage is not None and getattr(usage, "total_tokens", None):
+        llm_rate_scheduler.settle(charged, usage.total_tokens)
+    return response
+
+
+def _hedged_attempt(client, stage_name: str, kwargs: dict):
+    """
+    Send the request; if it has not answered within LLM_HEDGE_AFTER_S, send an
+    identical one and take whichever succeeds first. The loser's response is
+    discarded (the HTTP call cannot be cancelled mid-flight).
+    """
+    pool = _get_hedge_executor()
+    ctx = contextvars.copy_context()
+    primary = pool.submit(ctx.run, _attempt, client, stage_name, kwargs)
+    done, _ = wait([primary], timeout=LLM_HEDGE_AFTER_S)
+    if done:
+        return primary.result()
+
+    LLM_HEDGES.inc(stage_name, "fired")
+    hedge = pool.submit(contextvars.copy_context().run, _attempt, client, stage_name, kwargs)
+    pending = {primary, hedge}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    LLM_HEDGES.inc(stage_name, "won")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def create_chat_completion(client, stage_name: str = "llm", **kwargs):
+    """
+    Single blocking call site for Groq chat completions (used by every util).
+    Transient failures (429/5xx/timeouts) are retried with backoff, honouring
+    Retry-After; slow non-streaming calls may be hedged; while the circuit
+    breaker is open this raises CircuitOpenError without calling Groq.
+    Times the call as stage_name and counts its token usage; for stream=True
+    only opening the stream is timed and retried (see iter_completion_text).
+    """
+    streaming = bool(kwargs.get("stream"))
+    attempt = 0
+    while True:
+        llm_breaker.before_call()
+        try:
+            if LLM_HEDGE_AFTER_S > 0 and not streaming:
+                response = _hedged_attempt(client, stage_name, kwargs)
+            else:
+                response = _attempt(client, stage_name, kwargs)
+        except Exception as e:
+            if not is_transient(e):
+                llm_breaker.record_success()  # the provider answered; the request itself was bad
+                raise
+            wait_s = retry_after_s(e)
+            if getattr(e, "status_code", None) == 429:
+                # Our buckets ran ahead of the provider's: hold every caller, not just this one
+                llm_rate_scheduler.pause(wait_s if wait_s is not None else backoff_s(attempt))
+            if attempt >= LLM_MAX_RETRIES or (wait_s is not None and wait_s > LLM_RETRY_AFTER_MAX_S):
+                llm_breaker.record_failure()
+                raise
+            wait_s = backoff_s(attempt) if wait_s is None else wait_s
+            LLM_RETRIES.inc(stage_name, str(getattr(e, "status_code", None) or type(e).__name__))
+            print(f"--- WARNING: {stage_name} failed ({e}); retry {attempt + 1}/{LLM_MAX_RETRIES} in {wait_s:.2f}s ---")
+            time.sleep(wait_s)
+            attempt += 1
+            continue
+
+        llm_breaker.record_success()
+        if not streaming:
+            record_usage(stage_name, getattr(response, "usage", None))
+        return response
+
+
+async def _acquire_slot(priority: int) -> PriorityGate:
+    gate = _get_gate()
+    LLM_WAITING.inc(PRIORITY_NAMES[priority])
+    try:
+        await gate.acquire(priority)
+    finally:
+        LLM_WAITING.dec(PRIORITY_NAMES[priority])
+    LLM_IN_FLIGHT.inc()
+    return gate
+
+
+def _release_slot(gate: PriorityGate, priority: int):
+    LLM_IN_FLIGHT.dec()
+    gate.release(priority)
+
+
+async def run_llm(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking LLM-backed function (analyze_resume, generate_summary, ...)
+    on the LLM thread pool without blocking the event loop.
+    At most LLM_MAX_CONCURRENCY calls run at once; the rest wait their turn,
+    interactive calls ahead of batch and background ones (see llm_priority()).
+    """
+    loop = asyncio.get_running_loop()
+    # Copy the context so stage timings (and the priority) on the pool thread land in this request
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    priority = current_priority()
+    gate = await _acquire_slot(priority)
+    try:
+        return await loop.run_in_executor(_get_executor(), call)
+    finally:
+        _release_slot(gate, priority)
+
+
+async def run_llm_with_timeout(timeout: Optional[float], func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    run_llm() with a per-call timeout (slot wait included); raises
+    asyncio.TimeoutError when exceeded. A pool thread cannot be cancelled, so a
+    call that times out keeps its slot until the thread actually finishes.
+    """
+    if timeout is None:
+        return await run_llm(func, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    priority = current_priority()
+    gate = await asyncio.wait_for(_acquire_slot(priority), timeout)
+
+    def finished(fut: asyncio.Future):
+        _release_slot(gate, priority)
+        if not fut.cancelled():
+            fut.exception()  # retrieved, so an abandoned call's error is not logged as unhandled
+
+    future = loop.run_in_executor(_get_executor(), call)
+    future.add_done_callback(finished)
+    # asyncio.wait, unlike wait_for, leaves the future running when the time is up
+    done, _ = await asyncio.wait({future}, timeout=max(0.0, deadline - loop.time()))
+    if not done:
+        print(f"--- WARNING: LLM call {getattr(func, '__name__', func)} timed out after {timeout}s; "
+              f"its slot is held until the thread finishes ---")
+        raise asyncio.TimeoutError()
+    return future.result()
+
+
+def iter_completion_text(stream, stage_name: str = "llm") -> Iterator[str]:
+    """
+    Text deltas from a stream=True chat completion. The time spent consuming
+    the stream is recorded as "<stage_name>_stream"; Groq reports token usage
+    in x_groq on the final chunk.
+    """
+    with stage(f"{stage_name}_stream"):
+        for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+            x_groq = getattr(chunk, "x_groq", None)
+            record_usage(stage_name, getattr(x_groq, "usage", None) or getattr(chunk, "usage", None))
+
+
+_STREAM_DONE = object()
+
+
+class _StreamError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def stream_llm(func: Callable[..., Iterator[str]], *args, **kwargs) -> AsyncIterator[str]:
+    """
+    Async view of a blocking generator (e.g. stream_summary): the generator is
+    consumed on the LLM thread pool and its items are handed to the event loop
+    as they arrive. Holds an LLM_MAX_CONCURRENCY slot while streaming.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            for item in func(*args, **kwargs):
+                if stopped.is_set():
+                    break  # consumer went away; stop pulling from the provider
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, _StreamError(e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_DONE)
+
+    priority = current_priority()
+    gate = await _acquire_slot(priority)
+    loop.run_in_executor(_get_executor(), contextvars.copy_context().run, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, _StreamError):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        _release_slot(gate, priority)
+
+
+def shutdown_llm_executor():
+    global _executor, _hedge_executor
+    for executor in (_executor, _hedge_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _executor = _hedge_executor = None
@@ -0,0 +1,228 @@
+# utils/metrics.py
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# --- REQUEST-LEVEL PERFORMANCE INSTRUMENTATION ---
+# Every request gets a RequestTimings (via a ContextVar, so the code that
+# reads uploads, parses PDFs or calls the LLM on worker threads records into
+# the right request without passing it around). Each stage() lands in:
+#   - the request's Server-Timing response header
+#   - the stage_duration_seconds histogram on /metrics (Prometheus text format)
+#   - one "--- TIMING: {...} ---" line per request when REQUEST_TIMING_LOG is on
+# Metrics are per process: with several workers each one exposes its own.
+
+REQUEST_TIMING_LOG = os.getenv("REQUEST_TIMING_LOG", "true").lower() in ("1", "true", "yes")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *label_values: str, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+    def expose(self) -> List[str]:
+        lines = super().expose()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {bucket_count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {count}")
+                labels = _format_labels(self.labels, values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+# ---------- REGISTRY ----------
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "End-to-end request latency.",
+                             ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served.")
+STAGE_DURATION = Histogram("stage_duration_seconds", "Time spent per request stage.", ("stage",))
+LLM_IN_FLIGHT = Gauge("llm_calls_in_flight", "LLM calls running on the LLM pool.")
+LLM_WAITING = Gauge("llm_calls_waiting", "LLM calls queued for an LLM_MAX_CONCURRENCY slot.", ("priority",))
+LLM_RATE_WAIT = Histogram("llm_rate_limit_wait_seconds", "Time LLM calls waited for the RPM/TPM buckets.", ("priority",))
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the Groq usage field.", ("stage", "kind"))
+LLM_CACHE_LOOKUPS = Counter("llm_cache_lookups_total", "LLM result cache lookups.", ("namespace", "result"))
+LLM_RETRIES = Counter("llm_retries_total", "LLM calls retried after a transient failure.", ("stage", "reason"))
+LLM_HEDGES = Counter("llm_hedges_total", "Hedged LLM requests fired / won by the hedge.", ("stage", "outcome"))
+LLM_DEGRADED = Counter("llm_degraded_total", "Responses served from the local fallback instead of the LLM.", ("stage",))
+JOBS_TOTAL = Counter("jobs_total", "Async jobs by kind and event (submitted, done, failed, deferred).", ("kind", "event"))
+
+_REGISTRY = [REQUEST_DURATION, REQUESTS_IN_FLIGHT, STAGE_DURATION, LLM_IN_FLIGHT, LLM_WAITING, LLM_RATE_WAIT,
+             LLM_TOKENS, LLM_CACHE_LOOKUPS, LLM_RETRIES, LLM_HEDGES, LLM_DEGRADED, JOBS_TOTAL]
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+
+# ---------- PER-REQUEST TIMINGS ----------
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []  # (stage, seconds), in completion order
+        self.tokens: Dict[str, int] = {}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        # Repeated stages (e.g. several LLM calls) are summed into one entry
+        totals: Dict[str, float] = {}
+        for stage, seconds in self.stages:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()]
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    STAGE_DURATION.observe(seconds, stage)
+    timings = _current.get()
+    if timings is not None:
+        timings.stages.append((stage, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one request stage (works on worker threads too)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def record_since_request_start(stage_name: str):
+    """Record the time from request arrival until now (e.g. receiving the upload)."""
+    timings = _current.get()
+    if timings is not None:
+        record_stage(stage_name, timings.elapsed())
+
+
+def record_usage(stage_name: str, usage):
+    """Count prompt/completion tokens from a Groq usage object (None is ignored)."""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        count = getattr(usage, kind, None) or 0
+        if count:
+            LLM_TOKENS.inc(stage_name, kind, amount=count)
+            timings = _current.get()
+            if timings is not None:
+                timings.tokens[kind] = timings.tokens.get(kind, 0) + count
+
+
+# ---------- ASGI MIDDLEWARE ----------
+
+class TimingMiddleware:
+    """
+    Pure ASGI (like MaxBodySizeMiddleware): starts a RequestTimings per HTTP
+    request, adds Server-Timing to the response, and records request latency
+    and in-flight counts. Streaming responses carry the stages finished before
+    the first byte; their full duration still lands in the histogram.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = {"code": 500}
+        REQUESTS_IN_FLIGHT.inc()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router fills scope["route"] in place; use its template, not the raw path
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            total = timings.elapsed()
+            REQUEST_DURATION.observe(total, scope.get("method", ""), route, str(status["code"]))
+            _current.reset(token)
+            if REQUEST_TIMING_LOG and route != "/metrics":
+                log = {
+                    "route": route,
+                    "status": status["code"],
+                    "total_ms": round(total * 1000, 1),
+                    "stages": [[name, round(seconds * 1000, 1)] for name, seconds in timings.stages],
+                    "tokens": timings.tokens,
+                }
+                print(f"--- TIMING: {json.dumps(log)} ---")
@@ -0,0 +1,92 @@
+# utils/optimizer.py
+from typing import Iterator, TYPE_CHECKING
+if TYPE_CHECKING:  # the Groq SDK is imported lazily by utils/clients.py
+    from groq import Groq
+from utils.llm import create_chat_completion, iter_completion_text
+from utils.metrics import stage
+from utils.streaming import StreamCleaner
+from utils.cache import make_cache_key
+from utils.compactor import compact_resume, compact_job_description, RESUME_TOKEN_BUDGET, JD_TOKEN_BUDGET
+
+# Client is passed from main.py, same as analyzer/summary
+
+# Bump PROMPT_VERSION whenever the prompt changes; it is part of the LLM cache key.
+PROMPT_VERSION = "optimize-v3"
+TEMPERATURE = 0.4
+
+def optimize_cache_key(resume_text: str, job_description: str, missing_skills: str, model: str) -> str:
+    return make_cache_key("optimize", model=model, prompt_version=PROMPT_VERSION, temperature=TEMPERATURE,
+                          resume_text=resume_text, job_description=job_description, extra=f"{missing_skills}:{RESUME_TOKEN_BUDGET}:{JD_TOKEN_BUDGET}")
+
+def _optimize_messages(resume_text: str, job_description: str, missing_skills: str):
+    # --- REVISED PROMPT FOR GROQ ---
+    prompt_content = f"""
+        You are a highly skilled Resume Editor. Your goal is to improve the provided resume text
+        to maximize its alignment with the JOB DESCRIPTION and address the MISSING SKILLS.
+
+        Your output MUST be a single block of markdown text, ready to be pasted into a resume.
+        DO NOT include any conversational filler, explanation, or notes.
+        DO NOT change anything from name, give exact same as extracted
+
+
+        ### Optimization Task:
+        1. **Rewrite** the 'Experience', 'Projects', and/or 'Summary' sections of the RESUME.
+        2. **Focus** on integrating terms from the JOB DESCRIPTION.
+        3. **Demonstrate** how the candidate's experience covers the technical skills and addresses the {missing_skills} gap by re-phrasing existing bullet points.
+
+        ### Optimization Rules:
+        * **Do NOT** invent or fabricate any new experience, projects, or dates.
+        * **MUST** use strong, quantifiable action verbs (e.g., "Led," "Developed," "Optimized").
+        * **Output MUST** be in Markdown format, preserving original headings (e.g., ## Projects).
+
+        --- INPUT DATA ---
+        RESUME TEXT:
+        {compact_resume(resume_text)}
+
+        JOB DESCRIPTION:
+        {compact_job_description(job_description)}
+        """
+    # --- END REVISED PROMPT ---
+    return [
+        # System message is crucial for tone and output format
+        {"role": "system", "content": "You are a professional Resume Editor. Output ONLY the rewritten resume sections in Markdown format."},
+        {"role": "user", "content": prompt_content},
+    ]
+
+
+def optimize_cleaner() -> StreamCleaner:
+    # Strip a ```markdown ... ``` wrapper around the rewrite
+    return StreamCleaner(strip_fences=True)
+
+
+def optimize_resume(resume_text: str, job_description: str, missing_skills: str, client: "Groq", model: str) -> str:
+    """Rewrite resume sections in Markdown to better match the job description."""
+    with stage("prompt_build"):
+        messages = _optimize_messages(resume_text, job_description, missing_skills)
+    response = create_chat_completion(
+        client,
+        "llm_optimize",
+        model=model,
+        messages=messages,
+        temperature=TEMPERATURE, # Lowered for more precise, less creative rewriting
+    )
+
+    # Clean the response just in case
+    cleaner = optimize_cleaner()
+    return cleaner.feed(response.choices[0].message.content) + cleaner.finish()
+
+
+def stream_optimized_resume(resume_text: str, job_description: str, missing_skills: str,
+                            client: "Groq", model: str) -> Iterator[str]:
+    """Raw text deltas of the rewrite as the model produces them (clean with optimize_cleaner())."""
+    with stage("prompt_build"):
+        messages = _optimize_messages(resume_text, job_description, missing_skills)
+    stream = create_chat_completion(
+        client,
+        "llm_optimize",
+        model=model,
+        messages=messages,
+        temperature=TEMPERATURE,
+        stream=True,
+    )
+    yield from iter_completion_text(stream, "llm_optimize")
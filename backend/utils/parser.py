@@ -1,19 +1,238 @@
-import pdfplumber
-from docx import Document
+# utils/parser.py
+import io
 import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import BinaryIO, List, Optional, Union
 
-def extract_text(file_path: str) -> str:
-    text = ""
-    ext = os.path.splitext(file_path)[1].lower()
+# pdfplumber, pypdfium2 and python-docx are imported on first use (_pdfplumber(),
+# _pdfium(), _docx_document()) so importing this module stays cheap at startup.
+
+# A source is a filesystem path, raw bytes, or a binary file-like object
+# (e.g. UploadFile.file, which Starlette spools to disk only for large uploads).
+DocumentSource = Union[str, bytes, BinaryIO]
+
+# --- EXTRACTION LIMITS ---
+# Prompts never use more than a few thousand characters, so stop reading pages
+# once this many characters are collected. 0 disables the limit.
+MAX_EXTRACT_CHARS = int(os.getenv("MAX_EXTRACT_CHARS", "20000"))
+# "layout": pdfplumber only (reading order follows the page layout);
+# "fast": pdfium text layer only; "auto": pdfium first, pdfplumber layout analysis
+# only for pages pdfium returns empty.
+# pdfium returns text in content-stream order, which on multi-column resumes
+# (sample_resume.pdf) moves the name to the end and splits headings from their
+# sections, so the fast modes are opt-in for corpora known to be single-column.
+PDF_EXTRACT_MODE = os.getenv("PDF_EXTRACT_MODE", "layout")
+# PDFs with at least this many pages are extracted across a process pool.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "12"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))
+# Every web worker owns a pool, so split the cores between WEB_CONCURRENCY workers
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(max(1, min(4, (os.cpu_count() or 1) // WEB_CONCURRENCY)))))
+# Upper bound on one wave of pool tasks; a stuck worker fails the upload instead of hanging it
+PDF_TASK_TIMEOUT_S = float(os.getenv("PDF_TASK_TIMEOUT_S", "60"))
+
+# pdfium is not thread-safe; extractions from different request threads take turns
+_PDFIUM_LOCK = threading.Lock()
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+_PDFIUM_MISSING = object()
+_pdfium_module = None
+
+
+def _pdfplumber():
+    import pdfplumber
+    return pdfplumber
+
+
+def _pdfium():
+    """pypdfium2 module, or None when it is not installed."""
+    global _pdfium_module
+    if _pdfium_module is None:
+        try:
+            # pdfplumber already depends on pypdfium2; it gives us a much faster raw text layer
+            import pypdfium2
+            _pdfium_module = pypdfium2
+        except ImportError:  # pragma: no cover - optional fast path
+            _pdfium_module = _PDFIUM_MISSING
+    return None if _pdfium_module is _PDFIUM_MISSING else _pdfium_module
+
+
+def _docx_document(source):
+    from docx import Document
+    return Document(source)
+
+
+def preload_parsers():
+    """Import the parser libraries ahead of the first upload (startup prewarm)."""
+    _pdfplumber()
+    _pdfium()
+    import docx  # noqa: F401
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn, not fork: request threads may hold _PDFIUM_LOCK (or other locks) at
+        # fork time, and a forked worker would inherit them locked
+        _process_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+
+def shutdown_parser_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _pdf_input(source) -> DocumentSource:
+    """What pdfium / pdfplumber can open directly: a path, bytes, or the rewound stream (no copy)."""
+    if isinstance(source, bytearray):
+        return bytes(source)
+    if not isinstance(source, (str, bytes)):
+        source.seek(0)
+    return source
+
+
+def _pool_input(src: DocumentSource) -> Union[str, bytes]:
+    # Pool tasks are pickled: paths and bytes go as they are, a stream is read once here
+    if isinstance(src, (str, bytes)):
+        return src
+    src.seek(0)
+    return src.read()
+
+
+# ---------- PDF ----------
+
+def _open_pdfium(pdfium, src: DocumentSource):
+    if not isinstance(src, (str, bytes)):
+        src.seek(0)
+    return pdfium.PdfDocument(src)
+
+
+def _pdfplumber_pages(src: DocumentSource, indices: List[int]) -> List[str]:
+    if isinstance(src, bytes):
+        src = io.BytesIO(src)
+    elif not isinstance(src, str):
+        src.seek(0)
+    with _pdfplumber().open(src) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in indices]
+
+
+def _extract_pdf_pages(src: DocumentSource, start: int, stop: int, mode: str) -> List[str]:
+    """Text of pages [start, stop). Top-level so the process pool can pickle it."""
+    indices = list(range(start, stop))
+    pdfium = _pdfium()
+    if mode == "layout" or pdfium is None:
+        return _pdfplumber_pages(src, indices)
+
+    texts = []
+    with _PDFIUM_LOCK:
+        pdf = _open_pdfium(pdfium, src)
+        try:
+            for i in indices:
+                page = pdf[i]
+                textpage = page.get_textpage()
+                # pdfium reports line breaks as \r\n
+                texts.append((textpage.get_text_range() or "").replace("\r\n", "\n"))
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+
+    if mode == "auto":
+        # Only pay for layout analysis on pages without a usable text layer
+        empty = [i for i, t in zip(indices, texts) if not t.strip()]
+        if empty:
+            for i, text in zip(empty, _pdfplumber_pages(src, empty)):
+                texts[i - start] = text
+    return texts
+
+
+def _pdf_page_count(src: DocumentSource) -> int:
+    pdfium = _pdfium()
+    if pdfium is not None:
+        with _PDFIUM_LOCK:
+            pdf = _open_pdfium(pdfium, src)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    if isinstance(src, bytes):
+        src = io.BytesIO(src)
+    elif not isinstance(src, str):
+        src.seek(0)
+    with _pdfplumber().open(src) as pdf:
+        return len(pdf.pages)
+
+
+def _run_wave(src: Union[str, bytes], wave_start: int, wave_stop: int, mode: str) -> List[str]:
+    pool = _get_process_pool()
+    futures = [
+        pool.submit(_extract_pdf_pages, src, s, min(s + PDF_PAGES_PER_TASK, wave_stop), mode)
+        for s in range(wave_start, wave_stop, PDF_PAGES_PER_TASK)
+    ]
+    try:
+        return [text for f in futures for text in f.result(timeout=PDF_TASK_TIMEOUT_S)]
+    except FutureTimeoutError:
+        print(f"--- ERROR: PDF extraction pool timed out after {PDF_TASK_TIMEOUT_S}s; restarting the pool. ---")
+        for f in futures:
+            f.cancel()
+        shutdown_parser_pool()
+        raise
+
+
+def _extract_pdf(source: DocumentSource, max_chars: int, mode: str) -> str:
+    src = _pdf_input(source)
+    page_count = _pdf_page_count(src)
+    parallel = page_count >= PDF_PARALLEL_MIN_PAGES and PDF_WORKERS > 1
+    # Each step opens the document once; parallel steps fan one wave of tasks out
+    step = PDF_PAGES_PER_TASK * (PDF_WORKERS if parallel else 1)
+    if parallel:
+        src = _pool_input(src)
+
+    parts: List[str] = []
+    collected = 0
+    for wave_start in range(0, page_count, step):
+        wave_stop = min(wave_start + step, page_count)
+        if parallel:
+            wave = _run_wave(src, wave_start, wave_stop, mode)
+        else:
+            wave = _extract_pdf_pages(src, wave_start, wave_stop, mode)
+
+        parts.extend(wave)
+        collected += sum(len(t) for t in wave)
+        if max_chars and collected >= max_chars:
+            break
+    return "\n".join(parts)
+
+
+# ---------- ENTRY POINT ----------
+
+def extract_text(source: DocumentSource, filename: Optional[str] = None,
+                 max_chars: int = MAX_EXTRACT_CHARS, mode: str = PDF_EXTRACT_MODE) -> str:
+    # The extension comes from the path itself, or from filename for bytes/streams
+    name = source if isinstance(source, str) else (filename or getattr(source, "name", "") or "")
+    ext = os.path.splitext(str(name))[1].lower()
 
     if ext == ".pdf":
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
+        text = _extract_pdf(source, max_chars, mode)
     elif ext == ".docx":
-        doc = Document(file_path)
-        text = "\n".join([p.text for p in doc.paragraphs])
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        elif hasattr(source, "seek"):
+            source.seek(0)
+        doc = _docx_document(source)
+        parts, collected = [], 0
+        for p in doc.paragraphs:
+            parts.append(p.text)
+            collected += len(p.text) + 1
+            if max_chars and collected >= max_chars:
+                break
+        text = "\n".join(parts)
     else:
         raise ValueError("Unsupported file format")
     return text.strip()
-    
\ No newline at end of file
@@ -0,0 +1,193 @@
+# utils/resilience.py
+import os
+import re
+import json
+import time
+import random
+import threading
+from typing import Any, Optional
+
+# --- LLM FAILURE HANDLING ---
+# Transient Groq failures (429, 5xx, timeouts, dropped connections) are retried
+# with exponential backoff + jitter, honouring Retry-After. A circuit breaker
+# stops hammering a provider that keeps failing: while it is open, calls fail
+# fast with CircuitOpenError and the analyzer degrades to the local skill match.
+# Malformed JSON is repaired locally before anyone pays for another LLM call.
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "8"))
+# A Retry-After longer than this is not waited out: the call fails (and may degrade) instead
+LLM_RETRY_AFTER_MAX_S = float(os.getenv("LLM_RETRY_AFTER_MAX_S", "20"))
+# Fire a duplicate request when the first has not answered after this many seconds (0 = off)
+LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "0"))
+# Extra LLM calls allowed when a response is not valid JSON even after repair
+LLM_JSON_RETRIES = int(os.getenv("LLM_JSON_RETRIES", "1"))
+
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """The LLM circuit breaker is open; retry_after is the remaining cooldown."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM temporarily unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.retry_after = retry_after
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    return getattr(exc, "status_code", None)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Worth retrying: rate limits, server errors, timeouts and connection failures."""
+    import groq
+
+    if isinstance(exc, (groq.APITimeoutError, groq.APIConnectionError)):
+        return True
+    status = _status_code(exc)
+    return status is not None and status in RETRYABLE_STATUS
+
+
+def is_degradable(exc: BaseException) -> bool:
+    """Failures the analyzer answers with the local skill match instead of an error."""
+    return isinstance(exc, CircuitOpenError) or is_transient(exc)
+
+
+def retry_after_s(exc: BaseException) -> Optional[float]:
+    """Server-requested wait from retry-after-ms / retry-after headers, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # HTTP-date form; fall back to our own backoff
+    return None
+
+
+def backoff_s(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry number attempt (0-based)."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX_S, LLM_BACKOFF_BASE_S * (2 ** attempt)))
+
+
+# ---------- CIRCUIT BREAKER ----------
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive transient failures; after
+    `cooldown` seconds one probe call is let through (half-open). Its success
+    closes the circuit, its failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN_S):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.cooldown else "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless this call may go to the provider."""
+        if self.failures <= 0:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.cooldown - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(max(remaining, 1.0))
+            self._probing = True  # half-open: this call is the probe
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._probing or (self.failures > 0 and self._consecutive >= self.failures):
+                if self._opened_at is None or self._probing:
+                    print(f"--- WARNING: LLM circuit breaker opened after {self._consecutive} failures. ---")
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+llm_breaker = CircuitBreaker()
+
+
+# ---------- JSON REPAIR ----------
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*|\s*```\s*$")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_PY_LITERAL_RE = re.compile(r"\b(True|False|None)\b")
+
+
+def _close_brackets(text: str) -> str:
+    """Close strings/arrays/objects left open by a truncated response."""
+    stack, in_string, escaped = [], False, False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> Any:
+    """
+    Best-effort parse of almost-JSON model output: code fences, prose around
+    the object, smart quotes, trailing commas, Python literals, truncation.
+    Raises json.JSONDecodeError when nothing works.
+    """
+    candidate = _FENCE_RE.sub("", (text or "").strip())
+    start = min((i for i in (candidate.find("{"), candidate.find("[")) if i != -1), default=-1)
+    if start > 0:
+        candidate = candidate[start:]
+    end = max(candidate.rfind("}"), candidate.rfind("]"))
+    # Whole tail first (keeps fields of a truncated object), then without trailing prose
+    attempts = [candidate] if end == -1 else [candidate, candidate[:end + 1]]
+
+    for attempt in attempts:
+        attempt = attempt.replace("“", '"').replace("”", '"').replace("’", "'")
+        attempt = _TRAILING_COMMA_RE.sub(r"\1", attempt)
+        for fixed in (attempt, _close_brackets(attempt)):
+            fixed = _TRAILING_COMMA_RE.sub(r"\1", fixed)
+            try:
+                return json.loads(fixed)
+            except json.JSONDecodeError:
+                pass
+            try:
+                # Last resort, may also touch these words inside strings
+                return json.loads(_PY_LITERAL_RE.sub(lambda m: _PY_LITERALS[m.group(1)], fixed))
+            except json.JSONDecodeError:
+                pass
+    return json.loads(text)  # re-raise with the original text's error
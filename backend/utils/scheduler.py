@@ -0,0 +1,248 @@
+# utils/scheduler.py
+import os
+import time
+import bisect
+import asyncio
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# --- LLM ADMISSION CONTROL ---
+# Two gates sit in front of every Groq call, both ordered by priority class
+# (FIFO within a class):
+#   PriorityGate          async, in run_llm/stream_llm: who gets one of the
+#                         LLM_MAX_CONCURRENCY slots; batch and background work
+#                         are capped to a share of them so interactive requests
+#                         always find a free slot.
+#   TokenBucketScheduler  blocking, in create_chat_completion: requests/min and
+#                         tokens/min buckets sized to the Groq account limits,
+#                         charged with a token estimate of the actual prompt and
+#                         settled against the usage Groq reports.
+# A 429 pauses the buckets for the Retry-After, so every caller backs off at once.
+
+PRIORITY_INTERACTIVE = 0   # /analyze_resume/, /generate_summary/, /optimize_resume/
+PRIORITY_BATCH = 1         # /analyze_batch/
+PRIORITY_BACKGROUND = 2    # /market_trends refreshes
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BATCH: "batch", PRIORITY_BACKGROUND: "background"}
+
+# Account limits (0 = unlimited). Groq's free tier for llama-3.1-8b-instant is 30 RPM / 6000 TPM.
+# With SHARED_STORE=sqlite (several workers) the buckets live in the shared store,
+# so every worker draws on the one account quota, whatever started the workers.
+GROQ_RPM_LIMIT = float(os.getenv("GROQ_RPM_LIMIT", "0"))
+GROQ_TPM_LIMIT = float(os.getenv("GROQ_TPM_LIMIT", "0"))
+# Same switch as utils/shared_store.py (not imported here: shared_store -> cache -> llm -> scheduler)
+SHARED_BUCKETS = os.getenv("SHARED_STORE", "memory").lower() == "sqlite"
+# Longest a waiter sleeps on shared buckets before re-reading them (other workers refund and pause too)
+SHARED_BUCKET_POLL_S = 1.0
+# Completion tokens assumed per call when the request sets no max_tokens
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "400"))
+# Share of LLM_MAX_CONCURRENCY slots batch / background work may hold at once
+LLM_BATCH_SLOT_SHARE = float(os.getenv("LLM_BATCH_SLOT_SHARE", "0.75"))
+LLM_BACKGROUND_SLOT_SHARE = float(os.getenv("LLM_BACKGROUND_SLOT_SHARE", "0.25"))
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run the LLM calls made inside this block (and the threads they spawn) at priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def estimate_request_tokens(messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> int:
+    """Prompt tokens (plus ~4 per message of chat framing) + the expected completion."""
+    from utils.compactor import estimate_tokens  # local: compactor -> cache -> llm -> scheduler
+    prompt = sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
+    return prompt + (max_tokens or LLM_EXPECTED_COMPLETION_TOKENS)
+
+
+# ---------- CONCURRENCY SLOTS ----------
+
+class PriorityGate:
+    """asyncio.Semaphore replacement that hands out slots by (priority, arrival)."""
+
+    def __init__(self, limit: int, class_limits: Optional[Dict[int, int]] = None):
+        self.limit = limit
+        self.class_limits = class_limits or {}
+        self._active = 0
+        self._active_by_class: Dict[int, int] = {}
+        self._waiters: list = []  # sorted [(priority, seq, future)]
+        self._seq = itertools.count()
+
+    def _can_run(self, priority: int) -> bool:
+        return (self._active < self.limit
+                and self._active_by_class.get(priority, 0) < self.class_limits.get(priority, self.limit))
+
+    def _take(self, priority: int):
+        self._active += 1
+        self._active_by_class[priority] = self._active_by_class.get(priority, 0) + 1
+
+    def _wake(self):
+        # Grant slots front to back; a class at its cap does not block the classes behind it
+        i = 0
+        while i < len(self._waiters) and self._active < self.limit:
+            priority, _, future = self._waiters[i]
+            if future.done():
+                self._waiters.pop(i)
+            elif self._can_run(priority):
+                self._waiters.pop(i)
+                self._take(priority)
+                future.set_result(None)
+            else:
+                i += 1
+
+    async def acquire(self, priority: int):
+        if not self._waiters and self._can_run(priority):
+            self._take(priority)
+            return
+        future = asyncio.get_running_loop().create_future()
+        bisect.insort(self._waiters, (priority, next(self._seq), future))
+        # Queued waiters may all be classes at their cap: free slots go to this caller right away
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(priority)  # granted and cancelled in the same tick: give it back
+            raise
+
+    def release(self, priority: int):
+        self._active -= 1
+        self._active_by_class[priority] -= 1
+        self._wake()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+
+# ---------- RPM / TPM BUCKETS ----------
+
+class TokenBucketScheduler:
+    """
+    Requests/min and tokens/min token buckets (capacity = one minute of quota).
+    acquire() blocks the calling LLM pool thread until the highest-priority,
+    oldest waiter fits; it is a no-op when both limits are 0. With a shared_key
+    the bucket levels live in the shared store (see locked_state) and every
+    process draws on them; priority order then holds within each process.
+    """
+
+    def __init__(self, rpm: float = GROQ_RPM_LIMIT, tpm: float = GROQ_TPM_LIMIT, shared_key: Optional[str] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.shared_key = shared_key
+        self._requests = rpm
+        self._tokens = tpm
+        self._updated = self._now()
+        self._paused_until = 0.0
+        self._waiters: list = []  # sorted [(priority, seq)]
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0
+
+    def _now(self) -> float:
+        # Shared buckets are refilled by every process, so they run on wall-clock time
+        return time.time() if self.shared_key else time.monotonic()
+
+    @contextmanager
+    def _levels(self):
+        """Hold the bucket levels for a read-modify-write; loaded from and saved to the shared store."""
+        if not self.shared_key:
+            yield
+            return
+        from utils.shared_store import locked_state  # local: shared_store -> cache -> llm -> scheduler
+        with locked_state(self.shared_key) as state:
+            self._requests = state.get("requests", self.rpm)
+            self._tokens = state.get("tokens", self.tpm)
+            self._updated = state.get("updated", self._now())
+            self._paused_until = state.get("paused_until", 0.0)
+            yield
+            state.update(requests=self._requests, tokens=self._tokens, updated=self._updated,
+                         paused_until=self._paused_until)
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _wait_needed(self, now: float, tokens: int) -> float:
+        waits = [self._paused_until - now]
+        if self.rpm and self._requests < 1:
+            waits.append((1 - self._requests) * 60 / self.rpm)
+        if self.tpm and self._tokens < tokens:
+            waits.append((tokens - self._tokens) * 60 / self.tpm)
+        return max(waits)
+
+    def acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> int:
+        """Block until one request + tokens fit; returns the tokens actually charged."""
+        if not self.enabled:
+            return 0
+        if self.tpm:
+            tokens = min(tokens, int(self.tpm))  # a prompt larger than the bucket would never fit
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            bisect.insort(self._waiters, ticket)
+            try:
+                while True:
+                    timeout = None  # not at the front: sleep until the queue moves
+                    if self._waiters[0] == ticket:
+                        with self._levels():
+                            now = self._now()
+                            self._refill(now)
+                            timeout = self._wait_needed(now, tokens)
+                            if timeout <= 0:
+                                if self.rpm:
+                                    self._requests -= 1
+                                if self.tpm:
+                                    self._tokens -= tokens
+                                return tokens
+                        if self.shared_key:
+                            timeout = min(timeout, SHARED_BUCKET_POLL_S)
+                    self._cond.wait(timeout)
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+    def settle(self, charged: int, actual: int):
+        """Refund (or charge) the difference between the estimate and the reported usage."""
+        if not self.tpm or not charged:
+            return
+        with self._cond:
+            with self._levels():
+                self._tokens = min(self.tpm, self._tokens + charged - actual)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold every admission for seconds (after a provider 429)."""
+        if not self.enabled or seconds <= 0:
+            return
+        with self._cond:
+            with self._levels():
+                self._paused_until = max(self._paused_until, self._now() + seconds)
+            self._cond.notify_all()
+
+
+llm_rate_scheduler = TokenBucketScheduler(shared_key="groq_rate_buckets" if SHARED_BUCKETS else None)
+
+
+def build_llm_gate(limit: int) -> PriorityGate:
+    return PriorityGate(limit, {
+        PRIORITY_BATCH: max(1, int(limit * LLM_BATCH_SLOT_SHARE)),
+        PRIORITY_BACKGROUND: max(1, int(limit * LLM_BACKGROUND_SLOT_SHARE)),
+    })
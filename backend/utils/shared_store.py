@@ -0,0 +1,98 @@
+# utils/shared_store.py
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Union
+
+from utils.cache import MemoryCache, SQLiteCache
+
+# --- STATE SHARED ACROSS WORKER PROCESSES ---
+# With one uvicorn worker everything can live in process memory. With several
+# (WEB_CONCURRENCY > 1) document handles, rate-limiter slots, the Groq RPM/TPM
+# buckets and the LLM cache must be visible to every worker, so they move into
+# one SQLite file in WAL mode.
+#   SHARED_STORE=memory  in-process only (default for a single worker)
+#   SHARED_STORE=sqlite  SHARED_STORE_PATH, shared by every process on the box
+# main.py switches to sqlite automatically when it starts more than one worker.
+
+SHARED_STORE = os.getenv("SHARED_STORE", "memory").lower()
+SHARED_STORE_PATH = os.getenv("SHARED_STORE_PATH", "shared_state.sqlite3")
+
+
+def shared_kv(table: str, max_entries: int, ttl: int) -> Union[MemoryCache, SQLiteCache]:
+    """Key/value store with TTL: a MemoryCache, or a table in the shared SQLite file."""
+    if SHARED_STORE == "sqlite":
+        return SQLiteCache(SHARED_STORE_PATH, ttl=ttl, table=table)
+    return MemoryCache(max_entries=max_entries, ttl=ttl)
+
+
+# ---------- RATE-LIMIT SLOTS ----------
+# reserve_slot(key, interval) books the next start time for key and returns how
+# long the caller must wait for it. Slots are wall-clock times so every process
+# agrees on them.
+
+_slot_lock = threading.Lock()
+_memory_slots: Dict[str, float] = {}
+_slot_conn = None
+_slot_pid = None
+
+
+def _slot_connection() -> sqlite3.Connection:
+    global _slot_conn, _slot_pid
+    if _slot_conn is None or _slot_pid != os.getpid():
+        # Autocommit mode so BEGIN IMMEDIATE below controls the transaction
+        conn = sqlite3.connect(SHARED_STORE_PATH, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_slots (key TEXT PRIMARY KEY, next_at REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value TEXT)")
+        _slot_conn, _slot_pid = conn, os.getpid()
+    return _slot_conn
+
+
+def reserve_slot(key: str, interval: float) -> float:
+    """Seconds to wait before starting; blocking in sqlite mode (call off the event loop)."""
+    with _slot_lock:
+        now = time.time()
+        if SHARED_STORE != "sqlite":
+            next_at = _memory_slots.get(key, 0.0)
+            _memory_slots[key] = max(now, next_at) + interval
+            return next_at - now
+
+        conn = _slot_connection()
+        # BEGIN IMMEDIATE takes the write lock, so read-modify-write is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT next_at FROM rate_slots WHERE key = ?", (key,)).fetchone()
+            next_at = row[0] if row else 0.0
+            conn.execute("INSERT OR REPLACE INTO rate_slots (key, next_at) VALUES (?, ?)",
+                         (key, max(now, next_at) + interval))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return next_at - now
+
+
+# ---------- LOCKED STATE ----------
+# locked_state(key) yields the JSON dict stored under key with the write lock
+# held and saves it back on exit, so a read-modify-write (e.g. the RPM/TPM
+# buckets in utils/scheduler.py) is atomic across processes. sqlite mode only.
+
+@contextmanager
+def locked_state(key: str) -> Iterator[Dict[str, Any]]:
+    """Blocking (call off the event loop); an exception in the block discards the changes."""
+    with _slot_lock:
+        conn = _slot_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM shared_state WHERE key = ?", (key,)).fetchone()
+            state = json.loads(row[0]) if row else {}
+            yield state
+            conn.execute("INSERT OR REPLACE INTO shared_state (key, value) VALUES (?, ?)", (key, json.dumps(state)))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
@@ -1,5 +1,55 @@
 # utils/skill_matcher.py
+import os
+import re
+import json
+import threading
 import urllib.parse
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from utils.skill_taxonomy import CONTEXT_ALIASES, SKILL_TAXONOMY
+
+# --- LEARNING-RESOURCE CATALOG ---
+# Missing skills come from the LLM in free form ("python", "Python 3 ", "py3").
+# canonical_skill() folds case/whitespace, version suffixes and taxonomy aliases
+# into one name, and the links for each canonical skill are built once and kept
+# in a bounded LRU (taxonomy skills are precomputed on first use, or loaded from
+# SKILL_RESOURCES_FILE). Gap analysis is then a dict lookup per skill, and the
+# same skill across resumes in a batch shares one entry.
+
+SKILL_RESOURCES_FILE = os.getenv("SKILL_RESOURCES_FILE", "")
+SKILL_RESOURCE_CACHE_SIZE = int(os.getenv("SKILL_RESOURCE_CACHE_SIZE", "4096"))
+
+# alias / canonical name (lowercase) -> canonical name
+_ALIASES: Dict[str, str] = {}
+for _canonical, _aliases in SKILL_TAXONOMY.items():
+    _ALIASES[_canonical.lower()] = _canonical
+    for _alias in _aliases:
+        _ALIASES.setdefault(_alias.lower(), _canonical)
+# A skill name from the LLM is not prose: bare "react" or "spark" is the skill
+for _canonical, _aliases in CONTEXT_ALIASES.items():
+    for _alias in _aliases:
+        _ALIASES.setdefault(_alias.lower(), _canonical)
+
+_WS_RE = re.compile(r"\s+")
+_VERSION_RE = re.compile(r"\s*v?\d+(?:\.\d+)*\+?$")   # "Python 3.11", "python3.11", "Angular v15", "Java 8+"
+_EDGE_PUNCT = " \t\r\n-*•·,;:()[]\"'"   # plus trailing "." (a leading one is ".NET")
+
+
+def canonical_skill(skill: str) -> str:
+    """Canonical display name for a free-form skill ("" for blanks)."""
+    text = _WS_RE.sub(" ", (skill or "").strip(_EDGE_PUNCT).rstrip(_EDGE_PUNCT + "."))
+    if not text:
+        return ""
+    key = text.lower()
+    if key in _ALIASES:
+        return _ALIASES[key]
+    unversioned = _VERSION_RE.sub("", key)
+    if unversioned and unversioned in _ALIASES:
+        return _ALIASES[unversioned]
+    # Unknown skill: keep the author's capitalization, title-case all-lowercase input
+    return text.title() if text == key else text
+
 
 # --- MOCKED GOOGLE SEARCH RESPONSE STRUCTURE ---
 # In a real environment, this function would call a grounded LLM
@@ -8,7 +58,7 @@ def _search_for_resources(skill: str):
     """Mocks fetching links from specific providers."""
     # This structure simulates finding the best link for each source
     resources = {}
-    
+
     # 1. YouTube (Default/Tutorial focus)
     query_yt = f"{skill} full course tutorial"
     link_yt = f"https://www.youtube.com/results?search_query={urllib.parse.quote(query_yt)}"
@@ -18,50 +68,135 @@ def _search_for_resources(skill: str):
     query_crs = f"{skill} specialization Coursera"
     link_crs = f"https://www.coursera.org/search?query={urllib.parse.quote(query_crs)}"
     resources["Coursera"] = link_crs
-    
+
     # 3. Udemy (Hands-on/Practical focus)
     query_udm = f"{skill} masterclass Udemy"
     link_udm = f"https://www.udemy.com/courses/search/?q={urllib.parse.quote(query_udm)}"
     resources["Udemy"] = link_udm
-    
+
     return resources
 
-# --- RESOURCE ANALYSIS CORE FUNCTION ---
-def analyze_skill_gap(ai_result):
+
+class ResourceCatalog:
     """
-    Normalize missing_skills and produce targeted learning links per missing skill.
-    Accepts ai_result (dict) which may contain 'missing_skills' as list or string.
-    Returns dict:
-      - missing_skills: list[str]
-      - learning_resources: dict[str, dict[str, str]] 
-        (e.g., {'Python': {'YouTube': 'link1', 'Coursera': 'link2', 'Udemy': 'link3'}})
+    canonical skill -> {provider: url}. Entries loaded from a file (or the
+    taxonomy precompute) are pinned; links built on demand for other skills
+    live in an LRU of max_entries. Returned dicts are shared: do not mutate.
     """
-    missing = ai_result.get("missing_skills", []) or []
+
+    def __init__(self, max_entries: int = SKILL_RESOURCE_CACHE_SIZE, path: str = SKILL_RESOURCES_FILE):
+        self.max_entries = max_entries
+        self.path = path
+        self._pinned: Dict[str, Dict[str, str]] = {}
+        self._memo: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_loaded(self):
+        # Called with the lock held; deferred so importing this module stays cheap
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    entries = json.load(f)
+                for skill, links in entries.items():
+                    self._pinned[canonical_skill(skill)] = dict(links)
+                print(f"--- DEBUG: Loaded {len(entries)} learning-resource entries from {self.path}. ---")
+                return
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"--- WARNING: Could not load SKILL_RESOURCES_FILE '{self.path}' ({e}); building links instead. ---")
+        for skill in SKILL_TAXONOMY:
+            self._pinned[skill] = _search_for_resources(skill)
+
+    def get_many(self, skills: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Bulk lookup of already-canonical skills (one lock round trip, duplicates collapse)."""
+        out: Dict[str, Dict[str, str]] = {}
+        with self._lock:
+            self._ensure_loaded()
+            for skill in skills:
+                if skill in out:
+                    continue
+                links = self._pinned.get(skill)
+                if links is None:
+                    links = self._memo.get(skill)
+                    if links is not None:
+                        self._memo.move_to_end(skill)
+                if links is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    links = _search_for_resources(skill)
+                    self._memo[skill] = links
+                    if len(self._memo) > self.max_entries:
+                        self._memo.popitem(last=False)
+                out[skill] = links
+        return out
+
+    def get(self, skill: str) -> Dict[str, str]:
+        return self.get_many([skill])[skill]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pinned": len(self._pinned), "memoized": len(self._memo), "hits": self.hits, "misses": self.misses}
+
+    def dump(self, path: str, skills: Optional[Iterable[str]] = None) -> int:
+        """Write a precomputed catalog (taxonomy skills + any extra skills) for SKILL_RESOURCES_FILE."""
+        names = list(SKILL_TAXONOMY) + [canonical_skill(s) for s in (skills or [])]
+        entries = {name: _search_for_resources(name) for name in dict.fromkeys(n for n in names if n)}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1, ensure_ascii=False)
+        return len(entries)
+
+
+resource_catalog = ResourceCatalog()
+
+
+def normalize_skills(missing) -> List[str]:
+    """Split/clean a missing-skills list or string into unique canonical names, in order."""
     # Normalize to list
     if isinstance(missing, str):
         if "\n" in missing:
-            missing = [s.strip() for s in missing.split("\n") if s.strip()]
+            missing = missing.split("\n")
         else:
-            missing = [s.strip() for s in missing.split(",") if s.strip()]
+            missing = missing.split(",")
     elif not isinstance(missing, list):
         # fallback
         missing = list(missing) if missing else []
 
     cleaned = []
     for s in missing:
-        if not s:
+        skill = canonical_skill(s) if isinstance(s, str) else ""
+        # Filter out obvious garbage words (very short tokens), but keep taxonomy skills like "Go" or "R"
+        if not skill or (len(skill) <= 2 and skill not in SKILL_TAXONOMY):
             continue
-        # Filter out obvious garbage words (very short or non-alphabetic tokens)
-        if len(s) <= 2:
-            continue
-        cleaned.append(s)
+        cleaned.append(skill)
+    return list(dict.fromkeys(cleaned))
 
-    learning_resources = {}
-    for skill in cleaned:
-        # Generate resource links for each cleaned missing skill
-        learning_resources[skill] = _search_for_resources(skill)
 
+# --- RESOURCE ANALYSIS CORE FUNCTION ---
+def analyze_skill_gap(ai_result):
+    """
+    Normalize missing_skills and produce targeted learning links per missing skill.
+    Accepts ai_result (dict) which may contain 'missing_skills' as list or string.
+    Returns dict:
+      - missing_skills: list[str] (canonical names, deduplicated)
+      - learning_resources: dict[str, dict[str, str]]
+        (e.g., {'Python': {'YouTube': 'link1', 'Coursera': 'link2', 'Udemy': 'link3'}})
+    """
+    cleaned = normalize_skills(ai_result.get("missing_skills", []) or [])
     return {
         "missing_skills": cleaned,
-        "learning_resources": learning_resources,
+        "learning_resources": resource_catalog.get_many(cleaned),
     }
+
+
+if __name__ == "__main__":
+    # python -m utils.skill_matcher skill_resources.json  -> precomputed SKILL_RESOURCES_FILE
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "skill_resources.json"
+    print(f"--- DEBUG: Wrote {resource_catalog.dump(target)} entries to {target}. ---")
@@ -0,0 +1,369 @@
+# utils/skill_taxonomy.py
+import re
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# --- CURATED SKILL TAXONOMY ---
+# canonical name -> aliases (matched case-insensitively, on word boundaries).
+# Only aliases are matched, so every entry lists its own plain spelling.
+# Ambiguous everyday words ("go", "c", "r", "spring", "express") are only
+# matched through unambiguous aliases; the few that are too common in skill
+# lists to drop live in CONTEXT_ALIASES below.
+SKILL_TAXONOMY: Dict[str, List[str]] = {
+    # Programming languages
+    "Python": ["python", "python3", "python 3", "py3"],
+    "Java": ["java", "java 8", "java 11", "java 17", "core java"],
+    "JavaScript": ["javascript", "js", "es6", "ecmascript", "vanilla js"],
+    "TypeScript": ["typescript"],
+    "C++": ["c++", "cpp", "c plus plus"],
+    "C#": ["c#", "csharp", "c sharp"],
+    "C": ["c language", "c programming", "ansi c"],
+    "Go": ["golang", "go lang", "go language"],
+    "Rust": ["rust", "rustlang"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swiftui", "swift programming", "swift language"],
+    "PHP": ["php"],
+    "Ruby": ["ruby"],
+    "R": ["r programming", "r language", "rstudio"],
+    "Scala": ["scala"],
+    "MATLAB": ["matlab"],
+    "Bash": ["bash", "shell scripting", "shell script"],
+    "SQL": ["sql", "t-sql", "pl/sql", "plsql"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3", "scss", "sass"],
+    # Frameworks / libraries
+    "React": ["react.js", "reactjs", "react js"],
+    "Angular": ["angular", "angularjs", "angular.js"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Next.js": ["next.js", "nextjs"],
+    "Node.js": ["node.js", "nodejs", "node js"],
+    "Express.js": ["express.js", "expressjs"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring Boot": ["spring boot", "springboot", "spring framework"],
+    ".NET": [".net", "dotnet", "asp.net", ".net core"],
+    "Tailwind CSS": ["tailwind", "tailwindcss", "tailwind css"],
+    "Bootstrap": ["bootstrap"],
+    "Redux": ["redux"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["rest api", "rest apis", "restful", "restful api", "restful apis"],
+    # Data / ML
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning", "dl"],
+    "Artificial Intelligence": ["artificial intelligence", "ai"],
+    "Natural Language Processing": ["natural language processing", "nlp"],
+    "Computer Vision": ["computer vision", "opencv"],
+    "Generative AI": ["generative ai", "genai", "llm", "llms", "large language models"],
+    "TensorFlow": ["tensorflow", "tf2"],
+    "PyTorch": ["pytorch", "torch"],
+    "Keras": ["keras"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Data Visualization": ["data visualization", "data visualisation", "matplotlib", "seaborn"],
+    "Power BI": ["power bi", "powerbi"],
+    "Tableau": ["tableau"],
+    "Excel": ["ms excel", "microsoft excel", "advanced excel"],
+    "Apache Spark": ["apache spark", "pyspark", "spark sql"],
+    "Hadoop": ["hadoop"],
+    "Statistics": ["statistics", "statistical analysis"],
+    # Databases
+    "MySQL": ["mysql"],
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "SQLite": ["sqlite"],
+    "Oracle": ["oracle db", "oracle database"],
+    "Firebase": ["firebase", "firestore"],
+    "DynamoDB": ["dynamodb"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    # Cloud / DevOps
+    "AWS": ["aws", "amazon web services", "ec2", "aws lambda"],
+    "Azure": ["azure", "microsoft azure"],
+    "Google Cloud": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker", "containerization"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "Jenkins": ["jenkins"],
+    "CI/CD": ["ci/cd", "cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "GitHub Actions": ["github actions"],
+    "Git": ["git", "github", "gitlab", "bitbucket", "version control"],
+    "Linux": ["linux", "unix", "ubuntu"],
+    "Microservices": ["microservices", "microservice"],
+    "DevOps": ["devops"],
+    "Cloud Computing": ["cloud computing"],
+    # Mobile / other
+    "Android": ["android"],
+    "iOS": ["ios"],
+    "Flutter": ["flutter"],
+    "React Native": ["react native"],
+    "Unit Testing": ["unit testing", "pytest", "junit", "jest", "test driven development", "tdd"],
+    "Agile": ["agile", "scrum", "kanban"],
+    "Data Structures & Algorithms": ["data structures", "algorithms", "dsa"],
+    "Object-Oriented Programming": ["oop", "oops", "object oriented programming", "object-oriented programming"],
+    "System Design": ["system design"],
+    "Cybersecurity": ["cybersecurity", "cyber security", "information security", "network security"],
+    "Networking": ["networking", "tcp/ip"],
+    "Figma": ["figma"],
+    "UI/UX": ["ui/ux", "ux design", "ui design", "user experience"],
+    "Blockchain": ["blockchain", "solidity", "web3"],
+    # Spoken languages (the analyzer prompt treats these as skills too)
+    "English": ["english"],
+    "Hindi": ["hindi"],
+    "French": ["french"],
+    "Spanish": ["spanish"],
+    "German": ["german"],
+    "Chinese": ["chinese", "mandarin"],
+    "Tamil": ["tamil"],
+    "Telugu": ["telugu"],
+    "Arabic": ["arabic"],
+    "Japanese": ["japanese"],
+}
+
+# Everyday words that are also skill names ("excel at", "react quickly",
+# "spark innovation", "cloud-based"). They only count inside a skill list,
+# next to at least one unambiguous skill: "React, Node.js, Excel" matches all
+# three, "we excel and react fast" matches nothing.
+CONTEXT_ALIASES: Dict[str, List[str]] = {
+    "TypeScript": ["ts"],
+    "Swift": ["swift"],
+    "React": ["react"],
+    "Node.js": ["node"],
+    "Excel": ["excel"],
+    "Apache Spark": ["spark"],
+    "Cloud Computing": ["cloud"],
+}
+
+SPOKEN_LANGUAGES = {"English", "Hindi", "French", "Spanish", "German", "Chinese", "Tamil", "Telugu", "Arabic", "Japanese"}
+
+# --- RESUME SECTIONS ---
+# Heading lines (short, matched after dropping everything but letters and spaces)
+# start a section; used by analyze_text() and utils/compactor.py.
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "about me", "objective", "career objective"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "tech stack", "technologies", "tools"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history",
+                   "internships", "internship", "work history"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "education": ["education", "academic background", "qualifications", "academics"],
+    "certifications": ["certifications", "certificates", "courses", "licenses"],
+    "achievements": ["achievements", "awards", "honors", "accomplishments", "publications"],
+    "languages": ["languages", "spoken languages"],
+    "other": ["interests", "hobbies", "extracurricular activities", "activities", "volunteering", "references"],
+}
+_HEADING_LOOKUP = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+_HEADING_CLEAN_RE = re.compile(r"[^a-z ]+")
+MAX_HEADING_CHARS = 40
+
+
+def heading_section(line: str) -> Optional[str]:
+    """Section name if line is a section heading ("Technical Skills:" -> "skills"), else None."""
+    if len(line) > MAX_HEADING_CHARS:
+        return None
+    key = _HEADING_CLEAN_RE.sub("", line.lower()).strip()
+    return _HEADING_LOOKUP.get(key)
+
+
+_LINE_BREAK_RE = re.compile(r"\s*\n\s*")
+_SPACES_RE = re.compile(r"[^\S\n]+")
+# What may sit between two entries of a skill list: "React, Node.js", "Excel / SQL", "Spark and Hadoop"
+_LIST_GAP_RE = re.compile(r"[\s,;:/|&+•·()\-]*(?:(?:and|or)[\s,;:/|&+•·()\-]*)?")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch in "+#"
+
+
+def _starts_word(text: str, start: int) -> bool:
+    # "." glues dotted names together: no "js" inside "node.js"
+    return start == 0 or not (_is_word_char(text[start - 1]) or text[start - 1] == ".")
+
+
+def _ends_word(text: str, end: int) -> bool:
+    # A trailing "." ends the word only as punctuation ("python."), not in "node.js"
+    if end >= len(text):
+        return True
+    ch = text[end]
+    if ch == ".":
+        return end + 1 >= len(text) or not text[end + 1].isalnum()
+    return not _is_word_char(ch)
+
+
+class SkillAutomaton:
+    """
+    Aho-Corasick automaton over lowercase aliases; one pass finds every skill in
+    a text. Aliases from context_taxonomy only count inside a skill list (see
+    CONTEXT_ALIASES).
+    """
+
+    def __init__(self, taxonomy: Dict[str, List[str]], context_taxonomy: Optional[Dict[str, List[str]]] = None):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[tuple]] = [[]]  # (alias_length, canonical, needs_context)
+        for canonical, aliases in taxonomy.items():
+            for alias in set(aliases):
+                self._add(alias.lower(), canonical, False)
+        for canonical, aliases in (context_taxonomy or {}).items():
+            for alias in set(aliases):
+                self._add(alias.lower(), canonical, True)
+        self._build()
+
+    def _add(self, pattern: str, canonical: str, needs_context: bool):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = nxt
+        self.output[node].append((len(pattern), canonical, needs_context))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def scan(self, text: str) -> Tuple[str, Set[str], List[int]]:
+        """
+        One pass over text: (normalized text, skills, line start offsets). The
+        normalized text is lowercase with whitespace runs collapsed to one space,
+        or to one newline when they contain a line break; aliases match across
+        line breaks.
+        """
+        text = _SPACES_RE.sub(" ", _LINE_BREAK_RE.sub("\n", text.lower()))
+        found: Set[str] = set()
+        spans: List[tuple] = []  # (start, end, canonical, needs_context), only kept if a context alias matched
+        line_starts = [0]
+        has_context = False
+        node = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for i, ch in enumerate(text):
+            if ch == "\n":
+                line_starts.append(i + 1)
+                ch = " "
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node] and _ends_word(text, i + 1):
+                for length, canonical, needs_context in output[node]:
+                    start = i - length + 1
+                    if _starts_word(text, start):
+                        if not needs_context:
+                            found.add(canonical)
+                        has_context = has_context or needs_context
+                        spans.append((start, i + 1, canonical, needs_context))
+        if has_context:
+            found |= self._listed(text, spans)
+        return text, found, line_starts
+
+    def find(self, text: str) -> Set[str]:
+        return self.scan(text)[1]
+
+    @staticmethod
+    def _listed(text: str, spans: List[tuple]) -> Set[str]:
+        """Context-alias skills that sit in a run of list-separated matches with an unambiguous one."""
+        spans.sort()
+        listed: Set[str] = set()
+        group: List[tuple] = []
+        group_end = 0
+        for span in spans + [None]:
+            joined = span is not None and group and (
+                span[0] <= group_end or _LIST_GAP_RE.fullmatch(text, group_end, span[0]) is not None)
+            if not joined:
+                if any(not needs for _, _, _, needs in group):
+                    listed.update(canonical for _, _, canonical, needs in group if needs)
+                group, group_end = [], 0
+            if span is not None:
+                group.append(span)
+                group_end = max(group_end, span[1])
+        return listed
+
+
+# Built once at import; matching is a single linear scan per document
+SKILL_INDEX = SkillAutomaton(SKILL_TAXONOMY, CONTEXT_ALIASES)
+
+
+def find_skills(text: str) -> Set[str]:
+    return SKILL_INDEX.find(text or "")
+
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """
+    Skills, spoken languages and section boundaries of a resume or JD from one
+    automaton pass. Section offsets index into the returned normalized "text";
+    text before the first heading is the "header" section.
+    """
+    norm, skills, line_starts = SKILL_INDEX.scan(text or "")
+    sections: List[Dict[str, Any]] = []
+    ends = line_starts[1:] + [len(norm) + 1]
+    for start, end in zip(line_starts, ends):
+        # Only short lines can be headings; the rest are never sliced
+        if end - 1 - start > MAX_HEADING_CHARS:
+            continue
+        name = heading_section(norm[start:end - 1])
+        if name is None:
+            continue
+        if sections:
+            sections[-1]["end"] = start
+        elif start > 0:
+            sections.append({"name": "header", "start": 0, "end": start})
+        sections.append({"name": name, "start": start, "end": len(norm)})
+    if not sections and norm:
+        sections.append({"name": "header", "start": 0, "end": len(norm)})
+    return {
+        "text": norm,
+        "skills": sorted(skills),
+        "languages": sorted(skills & SPOKEN_LANGUAGES),
+        "sections": sections,
+    }
+
+
+def _match(jd_skills: Set[str], resume_skills: Set[str]) -> Dict[str, Any]:
+    matched = sorted(jd_skills & resume_skills)
+    pct: Optional[int] = round(100 * len(matched) / len(jd_skills)) if jd_skills else None
+    return {
+        "skill_match_pct": pct,
+        "matched_skills": matched,
+        "missing_skills": sorted(jd_skills - resume_skills),
+        "jd_skill_count": len(jd_skills),
+    }
+
+
+def local_skill_match(resume_text: str, job_description: str) -> Dict[str, Any]:
+    """
+    Deterministic skill match: which taxonomy skills the JD asks for and the
+    resume covers. skill_match_pct is None when the JD names no known skills.
+    """
+    return _match(find_skills(job_description), find_skills(resume_text))
+
+
+def format_match_summary(match: Dict[str, Any]) -> str:
+    """Compact matched/missing block for the analyzer prompt."""
+    if match["skill_match_pct"] is None:
+        return "No known skills detected in the job description."
+    return (
+        f"Deterministic keyword match: {match['skill_match_pct']}% "
+        f"({len(match['matched_skills'])}/{match['jd_skill_count']} JD skills found)\n"
+        f"Matched: {', '.join(match['matched_skills']) or 'none'}\n"
+        f"Missing: {', '.join(match['missing_skills']) or 'none'}"
+    )
+
+
+def jd_skill_matcher(job_description: str) -> Callable[[str], Dict[str, Any]]:
+    """local_skill_match bound to one JD: the JD is scanned once, each call scans one resume."""
+    jd_skills = find_skills(job_description)
+    return lambda resume_text: _match(jd_skills, find_skills(resume_text))
+
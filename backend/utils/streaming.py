@@ -0,0 +1,100 @@
+# utils/streaming.py
+import json
+from typing import Any, Dict
+
+# --- INCREMENTAL OUTPUT CLEANUP ---
+# The non-streaming routes clean the whole completion at once (.strip(), drop
+# "*"/"•", strip a ```markdown wrapper). StreamCleaner applies the same rules
+# chunk by chunk, holding back only what might still turn out to be leading
+# whitespace, an opening fence line, trailing whitespace or a closing fence.
+# Both paths use it, so streamed and buffered output are identical.
+
+FENCE = "```"
+
+
+class StreamCleaner:
+    def __init__(self, remove_chars: str = "", strip_fences: bool = False):
+        self.remove_chars = remove_chars
+        self.strip_fences = strip_fences
+        self._buf = ""
+        # "head" -> (optional "after_fence") -> "body"
+        self._state = "head"
+        # _buf starts a line until body text is emitted; after that the held text
+        # begins with the whitespace (and any "\n") cut from the end of the output
+        self._line_start = True
+
+    def _remove(self, text: str) -> str:
+        for ch in self.remove_chars:
+            text = text.replace(ch, "")
+        return text
+
+    def _advance_head(self, final: bool) -> bool:
+        """Drop leading whitespace and one opening fence line; True once body text starts."""
+        while True:
+            head = self._buf.lstrip()
+            self._buf = head
+            if not head:
+                return False
+            if self._state == "head" and self.strip_fences and (head.startswith(FENCE) or FENCE.startswith(head)):
+                newline = head.find("\n")
+                if newline == -1:
+                    if final:
+                        self._buf = ""  # the whole response was a bare fence line
+                    return False
+                self._buf = head[newline + 1:]
+                self._state = "after_fence"
+                continue
+            self._state = "body"
+            return True
+
+    def _closing_fence_at(self, text: str, end: int, exact: bool) -> int:
+        """
+        Start of the last line of text[:end] if that line is (exact) or could
+        still become (not exact) a closing fence on its own line, else -1.
+        """
+        last_newline = text.rfind("\n", 0, end)
+        if last_newline == -1 and not self._line_start:
+            return -1  # the line began in output already emitted: the backticks are inline
+        last_line = text[last_newline + 1:end].strip()
+        fence_line = last_line == FENCE if exact else bool(last_line) and FENCE.startswith(last_line)
+        return max(last_newline, 0) if fence_line else -1
+
+    def feed(self, text: str) -> str:
+        self._buf += self._remove(text)
+        if self._state != "body" and not self._advance_head(final=False):
+            return ""
+
+        # Hold back trailing whitespace, and a last line that could be a closing fence
+        cut = len(self._buf.rstrip())
+        if self.strip_fences:
+            fence = self._closing_fence_at(self._buf, cut, exact=False)
+            if fence != -1:
+                cut = fence
+        out, self._buf = self._buf[:cut], self._buf[cut:]
+        if out:
+            self._line_start = False
+        return out
+
+    def finish(self) -> str:
+        if self._state != "body" and not self._advance_head(final=True):
+            return ""
+        tail, self._buf = self._buf.rstrip(), ""
+        if self.strip_fences:
+            fence = self._closing_fence_at(tail, len(tail), exact=True)
+            if fence != -1:
+                tail = tail[:fence].rstrip()
+        return tail
+
+
+def clean_text(text: str, remove_chars: str = "", strip_fences: bool = False) -> str:
+    """Non-streaming cleanup with exactly the streaming rules."""
+    cleaner = StreamCleaner(remove_chars, strip_fences)
+    return cleaner.feed(text) + cleaner.finish()
+
+
+def format_event(event: Dict[str, Any], stream_format: str) -> str:
+    """One NDJSON line, or one SSE frame named after event["type"]."""
+    payload = json.dumps(event)
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
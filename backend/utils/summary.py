@@ -1,36 +1,75 @@
 # utils/summary.py
 import os
-from groq import Groq
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, TYPE_CHECKING
+if TYPE_CHECKING:  # the Groq SDK is imported lazily by utils/clients.py
+    from groq import Groq
+from utils.llm import create_chat_completion, iter_completion_text
+from utils.metrics import stage
+from utils.streaming import StreamCleaner
+from utils.cache import make_cache_key
+from utils.compactor import compact_resume, RESUME_TOKEN_BUDGET
 
 # No need for local config, client is passed from main.py
 
-# Added client: Groq and model: str to signature
-def generate_summary(resume_text: str, client: Groq, model: str) -> str:
+# Bump PROMPT_VERSION whenever the prompt changes; it is part of the LLM cache key.
+PROMPT_VERSION = "summary-v2"
+TEMPERATURE = 0.8
+
+def summary_cache_key(resume_text: str, model: str) -> str:
+    return make_cache_key("summary", model=model, prompt_version=PROMPT_VERSION, temperature=TEMPERATURE,
+                          resume_text=resume_text, extra=str(RESUME_TOKEN_BUDGET))
+
+def _summary_messages(resume_text: str):
+    prompt_content = (
+        "You are an expert recruiter. Read the following resume and write a concise 6-line paragraph "
+        "summarizing the candidate’s key strengths, technical skills, education, and focus area. "
+        "No bullet points, only professional paragraph form.\n\n"
+        f"Resume:\n{compact_resume(resume_text)}"
+    )
+    return [
+        {"role": "system", "content": "You are an expert recruiter. Your output must be a single, concise paragraph with no conversational filler."},
+        {"role": "user", "content": prompt_content},
+    ]
+
+
+def summary_cleaner() -> StreamCleaner:
+    # Strip markdown bullets/emphasis; the summary must be plain paragraph text
+    return StreamCleaner(remove_chars="*•")
+
+# Added client: "Groq" and model: str to signature
+def generate_summary(resume_text: str, client: "Groq", model: str) -> str:
     """Generate a professional resume summary using Groq Llama 3.1."""
     
     if not client:
         return "Error generating summary: Groq client failed to initialize."
 
     try:
-        prompt_content = (
-            "You are an expert recruiter. Read the following resume and write a concise 6-line paragraph "
-            "summarizing the candidate’s key strengths, technical skills, education, and focus area. "
-            "No bullet points, only professional paragraph form.\n\n"
-            f"Resume:\n{resume_text[:6000]}"
-        )
-        
-        response = client.chat.completions.create(
+        with stage("prompt_build"):
+            messages = _summary_messages(resume_text)
+        response = create_chat_completion(
+            client,
+            "llm_summary",
             model=model,
-            messages=[
-                {"role": "system", "content": "You are an expert recruiter. Your output must be a single, concise paragraph with no conversational filler."},
-                {"role": "user", "content": prompt_content},
-            ],
-            temperature=0.8,
+            messages=messages,
+            temperature=TEMPERATURE,
         )
         
-        summary = response.choices[0].message.content.strip()
-        summary = summary.replace("*", "").replace("•", "").replace("**", "").strip()
-        return summary
+        cleaner = summary_cleaner()
+        return cleaner.feed(response.choices[0].message.content) + cleaner.finish()
     except Exception as e:
-        return f"Error generating summary: {str(e)}"
\ No newline at end of file
+        return f"Error generating summary: {str(e)}"
+
+
+def stream_summary(resume_text: str, client: "Groq", model: str) -> Iterator[str]:
+    """Raw text deltas of the summary as the model produces them (clean with summary_cleaner())."""
+    with stage("prompt_build"):
+        messages = _summary_messages(resume_text)
+    stream = create_chat_completion(
+        client,
+        "llm_summary",
+        model=model,
+        messages=messages,
+        temperature=TEMPERATURE,
+        stream=True,
+    )
+    yield from iter_completion_text(stream, "llm_summary")
@@ -0,0 +1,77 @@
+# utils/uploads.py
+import os
+from typing import Dict, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from utils.parser import extract_text
+from utils.metrics import stage, record_since_request_start
+
+# --- UPLOAD LIMITS ---
+# Per-file cap, and a cap on the whole request body that is enforced while the
+# body streams in (before multipart parsing buffers it).
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(MAX_UPLOAD_BYTES + 1024 * 1024)))
+# Batch screening carries hundreds of resumes in one request
+BATCH_MAX_REQUEST_BYTES = int(os.getenv("BATCH_MAX_REQUEST_BYTES", str(200 * 1024 * 1024)))
+
+
+def _too_large(limit: int) -> str:
+    return f"Upload exceeds the {limit // (1024 * 1024)} MB limit."
+
+
+class MaxBodySizeMiddleware:
+    """Pure ASGI middleware: rejects oversized request bodies with 413 as they stream in."""
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        max_bytes = self.path_limits.get(scope["path"], self.max_bytes)
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            response = JSONResponse({"detail": _too_large(max_bytes)}, status_code=413)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # Raised inside body parsing; FastAPI turns it into a 413 response
+                    raise HTTPException(status_code=413, detail=_too_large(max_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def check_upload_size(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES):
+    size = file.size
+    if size is None:
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+    if size > max_bytes:
+        raise HTTPException(status_code=413, detail=_too_large(max_bytes))
+
+
+async def extract_upload_text(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """
+    Parse an uploaded resume straight from the upload's own spooled buffer:
+    no temp_{filename} copy on disk, no second in-memory copy. Parsing is
+    CPU-bound, so it runs in the threadpool instead of on the event loop.
+    """
+    # The form (and file) is fully received before the route runs
+    record_since_request_start("upload")
+    check_upload_size(file, max_bytes)
+    with stage("extract"):
+        return await run_in_threadpool(extract_text, file.file, file.filename)
@@ -629,6 +629,11 @@ const App = () => {
     const formData = new FormData();
     formData.append("file", file);
     formData.append("job_description", jobDesc);
+    // resume_text is opt-in on the backend; we need it for display and history
+    formData.append(
+      "fields",
+      "skill_match,missing_skills,strengths,weaknesses,suggestions,learning_resources,summary,resume_text"
+    );
 
     setLoading(true);
     setResult(null);
@@ -94,13 +94,28 @@ const ResultCard = ({ result = {}, originalResumeText, originalJobDesc }) => {
     setIsOptimizing(true);
     setShowOptimizer(true);
 
-    const formData = new FormData();
-    formData.append("resume_text", originalResumeText);
-    formData.append("job_description", originalJobDesc);
-    formData.append("missing_skills", missing_skills.join(", "));
+    // Send the server-side document handle when we have one; the full resume
+    // text is only re-sent if the handle has expired (404).
+    const buildForm = (useHandle) => {
+      const formData = new FormData();
+      if (useHandle) {
+        formData.append("document_id", result.document_id);
+      } else {
+        formData.append("resume_text", originalResumeText);
+      }
+      formData.append("job_description", originalJobDesc);
+      formData.append("missing_skills", missing_skills.join(", "));
+      return formData;
+    };
 
     try {
-      const res = await axios.post(`${apiUrl}/optimize_resume/`, formData);
+      let res;
+      try {
+        res = await axios.post(`${apiUrl}/optimize_resume/`, buildForm(Boolean(result.document_id)));
+      } catch (e) {
+        if (!result.document_id || e.response?.status !== 404) throw e;
+        res = await axios.post(`${apiUrl}/optimize_resume/`, buildForm(false));
+      }
       setOptimizedText(res.data.optimized_text);
     } catch (e) {
       console.error(e);